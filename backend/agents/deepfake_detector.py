@@ -68,6 +68,92 @@ Provide ONLY the JSON response."""
     return prompt
 
 
+def run_biometric_checks(transaction_data):
+    """
+    Structured biometric verification (deepfake API call, no LLM)
+    
+    Args:
+        transaction_data (dict): Must include user_id and photo_s3_path
+            (similarity_threshold optional, default 80)
+            
+    Returns:
+        dict: Parsed deepfake API result
+    """
+    user_id = transaction_data.get('user_id')
+    photo_s3_path = transaction_data.get('photo_s3_path')
+    similarity_threshold = transaction_data.get('similarity_threshold', 80)
+    
+    if not user_id or not photo_s3_path:
+        raise ValueError("Missing required fields: user_id and photo_s3_path")
+    
+    # Step 1: Call deepfake detection API
+    print("Step 1: Running biometric verification checks...")
+    api_response = call_deepfake_api(user_id, photo_s3_path, similarity_threshold)
+    
+    # Step 2: Parse results
+    print("Step 2: Analyzing verification results...")
+    deepfake_result = parse_deepfake_result(api_response)
+    
+    verdict_emoji = "✅" if deepfake_result['is_authentic'] else "⚠️"
+    print(f"{verdict_emoji} Verification: {deepfake_result['verification_result']}")
+    print(f"   Face Match: {deepfake_result['face_match']['similarity']:.1f}%")
+    print(f"   Deepfake Check: {'PASS' if deepfake_result['deepfake_detection']['is_real'] else 'FAIL'}")
+    print(f"   Liveness Check: {'PASS' if deepfake_result['liveness_check']['is_live'] else 'FAIL'}")
+    
+    return deepfake_result
+
+
+def get_nova_deepfake_analysis(transaction_data, deepfake_result):
+    """
+    Ask Nova to interpret the biometric checks
+    
+    Returns:
+        dict: Parsed Nova analysis (verdict, risk_assessment, recommended_action, reasoning)
+    """
+    print("\nStep 3: Consulting Nova Pro for expert verification analysis...")
+    prompt = build_deepfake_analysis_prompt(transaction_data, deepfake_result)
+    nova_response = call_nova(prompt, max_tokens=800, temperature=0.2)
+    print("✅ Nova analysis complete")
+    
+    try:
+        return json.loads(nova_response)
+    except json.JSONDecodeError:
+        return {
+            "verdict": "REVIEW",
+            "risk_assessment": ["Unable to parse analysis"],
+            "recommended_action": "Manual review required",
+            "reasoning": nova_response
+        }
+
+
+def build_deepfake_result(transaction_data, deepfake_result, nova_analysis=None):
+    """
+    Combine biometric checks and analysis into the agent's result
+    
+    Without nova_analysis (structured result) the verdict is the API's
+    verification_result.
+    """
+    if nova_analysis is not None:
+        final_verdict = str(nova_analysis.get('verdict', 'REVIEW'))
+    else:
+        final_verdict = str(deepfake_result['verification_result'])
+    
+    return {
+        "transaction_id": str(transaction_data.get('transaction_id')),
+        "user_id": str(transaction_data.get('user_id')),
+        "timestamp": datetime.now().isoformat(),
+        "verification_summary": {
+            "is_authentic": deepfake_result['is_authentic'],
+            "overall_confidence": deepfake_result['overall_confidence'],
+            "verification_result": deepfake_result['verification_result']
+        },
+        "detailed_checks": deepfake_result,
+        "nova_analysis": nova_analysis,
+        "final_verdict": final_verdict,
+        "photo_verified": transaction_data.get('photo_s3_path')
+    }
+
+
 def analyze_deepfake_verification(transaction_data):
     """
     Main deepfake detection agent
@@ -89,59 +175,14 @@ def analyze_deepfake_verification(transaction_data):
     print(f"{'='*60}\n")
     
     try:
-        user_id = transaction_data.get('user_id')
-        photo_s3_path = transaction_data.get('photo_s3_path')
-        similarity_threshold = transaction_data.get('similarity_threshold', 80)
-        
-        if not user_id or not photo_s3_path:
-            raise ValueError("Missing required fields: user_id and photo_s3_path")
-        
-        # Step 1: Call deepfake detection API
-        print("Step 1: Running biometric verification checks...")
-        api_response = call_deepfake_api(user_id, photo_s3_path, similarity_threshold)
+        # Steps 1-2: Biometric checks
+        deepfake_result = run_biometric_checks(transaction_data)
         
-        # Step 2: Parse results
-        print("Step 2: Analyzing verification results...")
-        deepfake_result = parse_deepfake_result(api_response)
-        
-        verdict_emoji = "✅" if deepfake_result['is_authentic'] else "⚠️"
-        print(f"{verdict_emoji} Verification: {deepfake_result['verification_result']}")
-        print(f"   Face Match: {deepfake_result['face_match']['similarity']:.1f}%")
-        print(f"   Deepfake Check: {'PASS' if deepfake_result['deepfake_detection']['is_real'] else 'FAIL'}")
-        print(f"   Liveness Check: {'PASS' if deepfake_result['liveness_check']['is_live'] else 'FAIL'}")
-        
-        # Step 3: Get Nova's expert analysis
-        print("\nStep 3: Consulting Nova Pro for expert verification analysis...")
-        prompt = build_deepfake_analysis_prompt(transaction_data, deepfake_result)
-        nova_response = call_nova(prompt, max_tokens=800, temperature=0.2)
-        print("✅ Nova analysis complete")
-        
-        # Step 4: Parse Nova's response
-        try:
-            nova_analysis = json.loads(nova_response)
-        except json.JSONDecodeError:
-            nova_analysis = {
-                "verdict": "REVIEW",
-                "risk_assessment": ["Unable to parse analysis"],
-                "recommended_action": "Manual review required",
-                "reasoning": nova_response
-            }
+        # Steps 3-4: Nova's expert analysis
+        nova_analysis = get_nova_deepfake_analysis(transaction_data, deepfake_result)
         
         # Step 5: Combine results
-        final_result = {
-            "transaction_id": str(transaction_data.get('transaction_id')),
-            "user_id": str(user_id),
-            "timestamp": datetime.now().isoformat(),
-            "verification_summary": {
-                "is_authentic": deepfake_result['is_authentic'],
-                "overall_confidence": deepfake_result['overall_confidence'],
-                "verification_result": deepfake_result['verification_result']
-            },
-            "detailed_checks": deepfake_result,
-            "nova_analysis": nova_analysis,
-            "final_verdict": str(nova_analysis.get('verdict', 'REVIEW')),
-            "photo_verified": photo_s3_path
-        }
+        final_result = build_deepfake_result(transaction_data, deepfake_result, nova_analysis)
         
         print(f"\n{'='*60}")
         print(f"✅ Verification Complete - Verdict: {final_result['final_verdict']}")
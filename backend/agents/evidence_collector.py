@@ -1,24 +1,26 @@
 import json
-from datetime import datetime, timedelta
-from tools.dynamodb_tools import (
-    get_user_profile,
-    get_user_transaction_history,
-    get_recent_transactions_count
-)
+import warnings
+import numpy as np
+from datetime import datetime
+from tools.dynamodb_tools import get_user_evidence_data, prefetch_user_evidence_data
 from tools.nova_tools import call_nova
+from tools.feature_store import store_user_features, get_user_features
+from tools.velocity_tools import get_user_velocity, parse_timestamp
+from config import POINT_IN_TIME_HISTORY_FEATURES
 
+# History columns encoded for set-based pattern membership
+PATTERN_CATEGORY_COLUMNS = {
+    'device': 'Device_Type',
+    'location': 'Location',
+    'merchant': 'Merchant_Category'
+}
 
-def is_within_24h(timestamp):
-    """Check if timestamp is within last 24 hours"""
-    if not timestamp:
-        return False
-    try:
-        if isinstance(timestamp, str):
-            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        now = datetime.now(timestamp.tzinfo) if timestamp.tzinfo else datetime.now()
-        return (now - timestamp) <= timedelta(hours=24)
-    except:
-        return False
+# Profile lists of known values for the same columns
+PATTERN_PROFILE_FIELDS = {
+    'device': 'known_devices',
+    'location': 'known_locations',
+    'merchant': 'known_merchants'
+}
 
 
 def build_timeline(transaction_history, current_transaction):
@@ -55,7 +57,66 @@ def build_timeline(transaction_history, current_transaction):
     return timeline
 
 
-def detect_patterns(transaction_data, user_profile, transaction_history):
+def build_history_columns(transaction_history):
+    """
+    Convert transaction items once into columnar NumPy arrays
+    
+    Args:
+        transaction_history (list): Transaction items (any order)
+        
+    Returns:
+        dict: 'ts' (epoch seconds, NaN if missing/unparseable), 'amount', and
+            integer category codes per column with their code tables
+    """
+    
+    timestamps = [t.get('Timestamp') for t in transaction_history]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # numpy warns on (UTC-normalized) offsets
+            parsed = np.array([ts or None for ts in timestamps], dtype='datetime64[us]')
+        ts = parsed.astype(np.int64) / 1e6
+        ts[np.isnat(parsed)] = np.nan
+    except ValueError:
+        ts = np.array([safe_parse_timestamp(value) for value in timestamps], dtype=np.float64)
+    
+    columns = {
+        'ts': ts,
+        'amount': np.array([float(t.get('Transaction_Amount') or 0) for t in transaction_history], dtype=np.float64)
+    }
+    
+    for name, attribute in PATTERN_CATEGORY_COLUMNS.items():
+        codes = {}
+        columns[name] = np.array(
+            [codes.setdefault(t.get(attribute), len(codes)) for t in transaction_history],
+            dtype=np.int32
+        )
+        columns[f'{name}_codes'] = codes
+    
+    return columns
+
+
+def safe_parse_timestamp(value):
+    try:
+        return parse_timestamp(value)
+    except (TypeError, ValueError, AttributeError):
+        return np.nan
+
+
+def known_categories(user_profile, columns):
+    """
+    Known values per pattern column, built once per detect_patterns call
+    
+    Returns:
+        dict: 'device' / 'location' / 'merchant' -> set of the profile's known
+            values plus every value seen in the history window
+    """
+    return {
+        name: set(user_profile.get(field, [])).union(columns[f'{name}_codes'])
+        for name, field in PATTERN_PROFILE_FIELDS.items()
+    }
+
+
+def detect_patterns(transaction_data, user_profile, transaction_history, velocity=None, columns=None):
     """
     Detect suspicious patterns in user behavior
     
@@ -63,6 +124,10 @@ def detect_patterns(transaction_data, user_profile, transaction_history):
         transaction_data (dict): Current transaction
         user_profile (dict): User's historical profile
         transaction_history (list): Recent transactions
+        velocity (dict): Sliding-window counts (get_user_velocity); when
+            omitted, velocity is derived from the history columns
+        columns (dict): build_history_columns(transaction_history), if
+            already built
         
     Returns:
         list: Detected patterns/anomalies
@@ -70,6 +135,10 @@ def detect_patterns(transaction_data, user_profile, transaction_history):
     
     patterns = []
     
+    if columns is None:
+        columns = build_history_columns(transaction_history)
+    known = known_categories(user_profile, columns)
+    
     current_amount = transaction_data.get('transaction_amount', 0)
     avg_amount = user_profile.get('avg_transaction_amount', 0)
     
@@ -79,26 +148,28 @@ def detect_patterns(transaction_data, user_profile, transaction_history):
         patterns.append(f"⚠️ Amount {multiplier}x higher than user average (${avg_amount:.2f})")
     
     # Pattern 2: High velocity
-    recent_24h = [t for t in transaction_history if is_within_24h(t.get('Timestamp'))]
-    if len(recent_24h) > 10:
-        patterns.append(f"⚠️ High velocity: {len(recent_24h)} transactions in last 24 hours")
+    if velocity is not None:
+        recent_24h_count = velocity['24h']['count']
+    else:
+        ts = columns['ts']
+        recent_24h_times = ts[parse_timestamp(datetime.now()) - ts <= 86400]  # NaN compares False
+        recent_24h_count = len(recent_24h_times)
+    if recent_24h_count > 10:
+        patterns.append(f"⚠️ High velocity: {recent_24h_count} transactions in last 24 hours")
     
     # Pattern 3: New device
     current_device = transaction_data.get('device_type')
-    known_devices = user_profile.get('known_devices', [])
-    if current_device and current_device not in known_devices:
+    if current_device and current_device not in known['device']:
         patterns.append(f"⚠️ New device detected: {current_device}")
     
     # Pattern 4: New location
     current_location = transaction_data.get('location')
-    known_locations = user_profile.get('known_locations', [])
-    if current_location and current_location not in known_locations:
+    if current_location and current_location not in known['location']:
         patterns.append(f"⚠️ New location: {current_location}")
     
     # Pattern 5: Unusual merchant
     current_merchant = transaction_data.get('merchant_category')
-    known_merchants = user_profile.get('known_merchants', [])
-    if current_merchant and current_merchant not in known_merchants:
+    if current_merchant and current_merchant not in known['merchant']:
         patterns.append(f"ℹ️ First transaction at {current_merchant}")
     
     # Pattern 6: Fraud history
@@ -106,87 +177,37 @@ def detect_patterns(transaction_data, user_profile, transaction_history):
         patterns.append(f"🚨 User has {user_profile['fraud_history']} previous fraud flags")
     
     # Pattern 7: Rapid successive transactions
-    if len(recent_24h) >= 3:
-        # Check if transactions are within 1 hour of each other
-        recent_times = [datetime.fromisoformat(t.get('Timestamp', '').replace('Z', '+00:00')) for t in recent_24h[:3]]
-        if len(recent_times) >= 2:
-            time_diff = (recent_times[0] - recent_times[-1]).total_seconds() / 3600
-            if time_diff < 1:
-                patterns.append(f"⚠️ Multiple transactions within 1 hour")
+    if velocity is not None:
+        if velocity['1h']['count'] >= 3:
+            patterns.append(f"⚠️ Multiple transactions within 1 hour")
+    elif recent_24h_count >= 3:
+        # Newest three of the last 24h within 1 hour of each other
+        newest = np.partition(recent_24h_times, recent_24h_count - 3)[-3:]
+        if newest.max() - newest.min() < 3600:
+            patterns.append(f"⚠️ Multiple transactions within 1 hour")
     
     return patterns
 
 
-def collect_evidence(transaction_data):
+def build_evidence_summary_prompt(transaction_data, evidence):
     """
-    Main evidence collection function
-    
-    Args:
-        transaction_data (dict): Current transaction details
-        
-    Returns:
-        dict: Evidence package
+    Build prompt for Nova to summarize an evidence package
     """
     
-    print(f"\n{'='*60}")
-    print(f"🔍 Collecting Evidence: {transaction_data.get('transaction_id', 'Unknown')}")
-    print(f"{'='*60}\n")
+    profile = evidence['user_profile']
+    history = evidence['transaction_history']
+    patterns = evidence['detected_patterns']
+    known_devices = profile['known_devices']
     
-    try:
-        user_id = transaction_data.get('user_id')
-        
-        if not user_id:
-            raise ValueError("user_id is required")
-        
-        # Step 1: Get User Profile
-        print("Step 1: Fetching user profile...")
-        user_profile = get_user_profile(user_id)
-        
-        # Step 2: Get Transaction History
-        print("\nStep 2: Retrieving transaction history...")
-        # Get all history (no date filter since CSV has old data)
-        transaction_history = get_user_transaction_history(user_id, days=None, limit=100)
-        
-        history_count = len(transaction_history)
-        recent_24h_count = get_recent_transactions_count(user_id, hours=24)
-        
-        print(f"   📈 Total: {history_count} | Last 24h: {recent_24h_count}")
-        
-        # Step 3: Build Timeline
-        print("\nStep 3: Building timeline...")
-        timeline = build_timeline(transaction_history, transaction_data)
-        
-        # Step 4: Detect Patterns
-        print("\nStep 4: Detecting suspicious patterns...")
-        patterns = detect_patterns(transaction_data, user_profile, transaction_history)
-        
-        if patterns:
-            print(f"   🔴 Found {len(patterns)} patterns:")
-            for pattern in patterns:
-                print(f"      {pattern}")
-        else:
-            print("   ✅ No suspicious patterns detected")
-        
-        # Step 5: Generate LLM Summary
-        print("\nStep 5: Generating evidence summary with Nova...")
-
-        # Safe access to user profile with defaults
-        avg_amount = user_profile.get('avg_transaction_amount', 0)
-        min_amount = user_profile.get('min_transaction', 0)
-        max_amount = user_profile.get('max_transaction', 0)
-        total_txns = user_profile.get('total_transactions', 0)
-        known_devices = user_profile.get('known_devices', [])
-        fraud_history = user_profile.get('fraud_history', 0)
-
-        prompt = f"""You are a financial transaction analyst. Provide a brief 2-3 sentence analysis of this user's transaction profile.
+    prompt = f"""You are a financial transaction analyst. Provide a brief 2-3 sentence analysis of this user's transaction profile.
 
         **User Activity Summary:**
-        - User ID: {user_id}
-        - Historical Transactions: {total_txns}
-        - Typical Transaction: ${avg_amount:.2f}
-        - Range: ${min_amount:.2f} - ${max_amount:.2f}
+        - User ID: {profile['user_id']}
+        - Historical Transactions: {profile['total_transactions']}
+        - Typical Transaction: ${profile['avg_transaction_amount']:.2f}
+        - Range: ${profile['transaction_range']['min']:.2f} - ${profile['transaction_range']['max']:.2f}
         - Devices Used: {', '.join(known_devices) if known_devices else 'Unknown'}
-        - Previous Issues: {fraud_history} flags
+        - Previous Issues: {profile['fraud_history']} flags
 
         **Current Transaction Under Review:**
         - Amount: ${transaction_data.get('transaction_amount', 0):.2f}
@@ -195,54 +216,184 @@ def collect_evidence(transaction_data):
         - Device: {transaction_data.get('device_type', 'Unknown')}
 
         **Activity Metrics:**
-        - Recent (24h): {recent_24h_count} transactions
-        - Historical (90d): {history_count} transactions
+        - Recent (24h): {history['recent_24h_count']} transactions
+        - Historical (90d): {history['total_count']} transactions
 
         **Notable Observations:**
         {chr(10).join(patterns) if patterns else 'Standard transaction pattern'}
 
         Provide a professional summary highlighting key observations about this transaction relative to the user's normal behavior."""
 
+    return prompt
+
+
+def gather_evidence(transaction_data, prefetched=None):
+    """
+    Structured evidence collection (DynamoDB + pattern detection, no LLM)
+    
+    Args:
+        transaction_data (dict): Current transaction details
+        prefetched (tuple): (profile, history, recent_count) from
+            prefetch_user_evidence_data; skips the DynamoDB reads
+        
+    Returns:
+        dict: Evidence package with llm_summary left as None; with
+            POINT_IN_TIME_HISTORY_FEATURES, 'history_features' holds the
+            user-history model features to pass to predict_fraud
+    """
+    
+    user_id = transaction_data.get('user_id')
+    
+    if not user_id:
+        raise ValueError("user_id is required")
+    
+    # Steps 1-2: Profile, history window and 24h count from a single history read
+    print("Step 1-2: Fetching user profile and transaction history...")
+    # Get all history (no date filter since CSV has old data)
+    if prefetched is None:
+        prefetched = get_user_evidence_data(user_id, history_limit=100, recent_hours=24)
+    user_profile, transaction_history, recent_24h_count = prefetched
+    
+    # History features for the ML scorer from the same read (no second DynamoDB read)
+    history_features = None
+    if POINT_IN_TIME_HISTORY_FEATURES:
+        store_user_features(user_id, user_profile, transaction_history)
+        history_features = get_user_features(user_id, transaction_data.get('timestamp'))
+        if history_features is not None:
+            history_features['known_devices'] = sorted(history_features['known_devices'])
+    velocity = get_user_velocity(user_id)
+    
+    history_count = len(transaction_history)
+    
+    print(f"   📈 Total: {history_count} | Last 24h: {recent_24h_count}")
+    
+    # Step 3: Build Timeline
+    print("\nStep 3: Building timeline...")
+    timeline = build_timeline(transaction_history, transaction_data)
+    
+    # Step 4: Detect Patterns
+    print("\nStep 4: Detecting suspicious patterns...")
+    columns = build_history_columns(transaction_history)
+    patterns = detect_patterns(transaction_data, user_profile, transaction_history, velocity, columns)
+    
+    if patterns:
+        print(f"   🔴 Found {len(patterns)} patterns:")
+        for pattern in patterns:
+            print(f"      {pattern}")
+    else:
+        print("   ✅ No suspicious patterns detected")
+    
+    # Safe access to user profile with defaults
+    avg_amount = user_profile.get('avg_transaction_amount', 0)
+    min_amount = user_profile.get('min_transaction', 0)
+    max_amount = user_profile.get('max_transaction', 0)
+    
+    # Build evidence package
+    return {
+        'user_profile': {
+            'user_id': user_id,
+            'total_transactions': user_profile.get('total_transactions', 0),
+            'avg_transaction_amount': round(avg_amount, 2),
+            'transaction_range': {
+                'min': round(min_amount, 2),
+                'max': round(max_amount, 2)
+            },
+            'known_devices': user_profile.get('known_devices', []),
+            'known_locations': user_profile.get('known_locations', [])[:5],
+            'fraud_history': user_profile.get('fraud_history', 0)
+        },
+        'transaction_history': {
+            'total_count': history_count,
+            'recent_24h_count': recent_24h_count,
+            'recent_transactions': [
+                {
+                    'amount': float(t.get('Transaction_Amount', 0)),
+                    'merchant': t.get('Merchant_Category'),
+                    'time': t.get('Timestamp'),
+                    'fraud_flag': int(t.get('Fraud_Label', 0))
+                }
+                for t in transaction_history[:5]
+            ]
+        },
+        'timeline': timeline,
+        'detected_patterns': patterns,
+        'history_features': history_features,
+        'llm_summary': None,
+        'agent': 'evidence_collector',
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def gather_evidence_batch(transactions):
+    """
+    Structured evidence for a batch, with one bulk DynamoDB prefetch
+    
+    Args:
+        transactions (list): Transaction dicts
+        
+    Returns:
+        list: Evidence packages (or error dicts) in input order
+    """
+    
+    user_data = prefetch_user_evidence_data(
+        [txn.get('user_id') for txn in transactions], history_limit=100, recent_hours=24
+    )
+    
+    results = []
+    for txn in transactions:
         try:
-            llm_summary = call_nova(prompt, max_tokens=300, temperature=0.3)
-            print("   ✅ Summary generated")
+            results.append(gather_evidence(txn, prefetched=user_data.get(txn.get('user_id'))))
         except Exception as e:
-            print(f"   ⚠️  Nova summary failed: {e}")
-            llm_summary = "Unable to generate summary due to system error."
+            results.append({
+                'error': str(e),
+                'agent': 'evidence_collector',
+                'timestamp': datetime.now().isoformat()
+            })
+    
+    return results
+
+
+def summarize_evidence(transaction_data, evidence):
+    """
+    Generate the Nova summary for an evidence package
+    
+    Returns:
+        str: Summary text (or a fallback message if Nova fails)
+    """
+    print("\nStep 5: Generating evidence summary with Nova...")
+    prompt = build_evidence_summary_prompt(transaction_data, evidence)
+    
+    try:
+        llm_summary = call_nova(prompt, max_tokens=300, temperature=0.3)
+        print("   ✅ Summary generated")
+        return llm_summary
+    except Exception as e:
+        print(f"   ⚠️  Nova summary failed: {e}")
+        return "Unable to generate summary due to system error."
+
+
+def collect_evidence(transaction_data):
+    """
+    Main evidence collection function
+    
+    Args:
+        transaction_data (dict): Current transaction details
+        
+    Returns:
+        dict: Evidence package
+    """
+    
+    print(f"\n{'='*60}")
+    print(f"🔍 Collecting Evidence: {transaction_data.get('transaction_id', 'Unknown')}")
+    print(f"{'='*60}\n")
+    
+    try:
+        # Steps 1-4: Profile, history, timeline and patterns
+        evidence = gather_evidence(transaction_data)
+        
+        # Step 5: Generate LLM Summary
+        evidence['llm_summary'] = summarize_evidence(transaction_data, evidence)
         
-        # Build evidence package
-        evidence = {
-            'user_profile': {
-                'user_id': user_id,
-                'total_transactions': total_txns,
-                'avg_transaction_amount': round(avg_amount, 2),
-                'transaction_range': {
-                    'min': round(min_amount, 2),
-                    'max': round(max_amount, 2)
-                },
-                'known_devices': known_devices,
-                'known_locations': user_profile.get('known_locations', [])[:5],
-                'fraud_history': fraud_history
-            },
-            'transaction_history': {
-                'total_count': history_count,
-                'recent_24h_count': recent_24h_count,
-                'recent_transactions': [
-                    {
-                        'amount': float(t.get('Transaction_Amount', 0)),
-                        'merchant': t.get('Merchant_Category'),
-                        'time': t.get('Timestamp'),
-                        'fraud_flag': int(t.get('Fraud_Label', 0))
-                    }
-                    for t in transaction_history[:5]
-                ]
-            },
-            'timeline': timeline,
-            'detected_patterns': patterns,
-            'llm_summary': llm_summary,
-            'agent': 'evidence_collector',
-            'timestamp': datetime.now().isoformat()
-        }
         print(f"\n{'='*60}")
         print(f"✅ Evidence Collection Complete")
         print(f"{'='*60}\n")
@@ -253,4 +404,4 @@ def collect_evidence(transaction_data):
         print(f"\n❌ Error collecting evidence: {e}")
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
@@ -1,6 +1,9 @@
 import json
 from datetime import datetime
-from tools.nova_tools import call_nova
+from tools.nova_tools import call_nova, call_nova_streaming
+
+# Generated first (see the prompt template) so they can be surfaced early
+DECISION_FIELDS = ('final_verdict', 'risk_level', 'recommended_action')
 
 
 def build_risk_assessment_prompt(transaction_data, fraud_result, evidence_result, deepfake_result):
@@ -10,11 +13,12 @@ def build_risk_assessment_prompt(transaction_data, fraud_result, evidence_result
     
     # Extract key metrics
     ml_score = fraud_result.get('final_score', 0)
-    ml_verdict = fraud_result.get('final_verdict', 'UNKNOWN')
+    # Structured (pre-LLM) agent results carry no analyst verdict/summary yet
+    ml_verdict = fraud_result.get('final_verdict') or 'Pending (ML score only)'
     ml_risk_level = fraud_result.get('ml_prediction', {}).get('risk_level', 'UNKNOWN')
     
     evidence_patterns = evidence_result.get('detected_patterns', [])
-    evidence_summary = evidence_result.get('llm_summary', 'Not available')
+    evidence_summary = evidence_result.get('llm_summary') or 'Not available'
     user_profile = evidence_result.get('user_profile', {})
     
     has_photo = deepfake_result is not None and not deepfake_result.get('error')
@@ -96,6 +100,7 @@ Based on ALL the evidence above, provide a detailed risk assessment in JSON form
   "final_verdict": "APPROVED/REJECTED/REVIEW",
   "confidence_score": 85,
   "risk_level": "LOW/MEDIUM/HIGH/CRITICAL",
+  "recommended_action": "Clear, actionable recommendation (e.g., 'Approve transaction', 'Reject and notify user', 'Request additional verification')",
   
   "risk_summary": "2-3 sentence executive summary of the overall risk",
   
@@ -117,8 +122,6 @@ Based on ALL the evidence above, provide a detailed risk assessment in JSON form
   
   "decision_reasoning": "Detailed 3-4 sentence explanation of why you made this decision, referencing specific findings from each agent",
   
-  "recommended_action": "Clear, actionable recommendation (e.g., 'Approve transaction', 'Reject and notify user', 'Request additional verification')",
-  
   "agent_consensus": "Do the agents agree? Any conflicts in their assessments?",
   
   "confidence_breakdown": {{
@@ -141,7 +144,7 @@ Return ONLY the JSON response, no additional text."""
     return prompt
 
 
-def assess_risk(transaction_data, fraud_result, evidence_result, deepfake_result):
+def assess_risk(transaction_data, fraud_result, evidence_result, deepfake_result, on_decision=None):
     """
     Main risk assessment function - synthesizes all agent results
     
@@ -150,6 +153,9 @@ def assess_risk(transaction_data, fraud_result, evidence_result, deepfake_result
         fraud_result (dict): Results from Transaction Monitor agent
         evidence_result (dict): Results from Evidence Collector agent
         deepfake_result (dict): Results from Deepfake Detector agent (or None)
+        on_decision (callable): Optional; the response is streamed and this
+            receives the DECISION_FIELDS as soon as Nova has generated them,
+            before the reasoning text
         
     Returns:
         dict: Comprehensive risk assessment
@@ -171,7 +177,12 @@ def assess_risk(transaction_data, fraud_result, evidence_result, deepfake_result
         
         # Get detailed assessment from Nova
         print("   🤖 Generating detailed risk assessment with Nova Pro...")
-        nova_response = call_nova(prompt, max_tokens=1500, temperature=0.3)
+        if on_decision is not None:
+            nova_response = call_nova_streaming(
+                prompt, DECISION_FIELDS, on_decision, max_tokens=1500, temperature=0.3
+            )
+        else:
+            nova_response = call_nova(prompt, max_tokens=1500, temperature=0.3)
         
         # Parse response
         try:
@@ -43,6 +43,55 @@ Provide ONLY the JSON response, no additional text."""
     return prompt
 
 
+def get_nova_fraud_analysis(transaction_data, ml_result):
+    """
+    Ask Nova to interpret an ML prediction
+    
+    Args:
+        transaction_data (dict): Transaction details
+        ml_result (dict): Output of predict_fraud
+        
+    Returns:
+        dict: Parsed Nova analysis (verdict, risk_factors, recommended_action, reasoning)
+    """
+    # Build prompt for Nova
+    print("\nStep 2: Preparing analysis for Nova Pro...")
+    prompt = build_fraud_analysis_prompt(transaction_data, ml_result)
+    
+    # Get Nova's analysis
+    print("Step 3: Consulting Nova Pro for expert analysis...")
+    nova_response = call_nova(prompt, max_tokens=800, temperature=0.3)
+    print("✅ Nova analysis complete")
+    
+    # Parse Nova's JSON response
+    try:
+        return json.loads(nova_response)
+    except json.JSONDecodeError:
+        # Fallback if Nova doesn't return perfect JSON
+        return {
+            "verdict": "REVIEW",
+            "risk_factors": ["Unable to parse Nova response"],
+            "recommended_action": "Manual review required",
+            "reasoning": nova_response
+        }
+
+
+def build_monitor_result(transaction_data, ml_result, nova_analysis=None):
+    """
+    Combine ML prediction and analysis into the agent's result
+    
+    Without nova_analysis (structured result) final_verdict is None.
+    """
+    return {
+        "transaction_id": transaction_data.get("transaction_id"),
+        "timestamp": datetime.now().isoformat(),
+        "ml_prediction": ml_result,
+        "nova_analysis": nova_analysis,
+        "final_verdict": nova_analysis.get("verdict", "REVIEW") if nova_analysis is not None else None,
+        "final_score": ml_result["fraud_score"]
+    }
+
+
 def analyze_transaction(transaction_data):
     """
     Main agent function: Analyze transaction using ML + Nova
@@ -63,36 +112,11 @@ def analyze_transaction(transaction_data):
         ml_result = predict_fraud(transaction_data)
         print(f"✅ ML Prediction: {ml_result['risk_level']} risk ({ml_result['fraud_score']}/100)")
         
-        # Step 2: Build prompt for Nova
-        print("\nStep 2: Preparing analysis for Nova Pro...")
-        prompt = build_fraud_analysis_prompt(transaction_data, ml_result)
-        
-        # Step 3: Get Nova's analysis
-        print("Step 3: Consulting Nova Pro for expert analysis...")
-        nova_response = call_nova(prompt, max_tokens=800, temperature=0.3)
-        print("✅ Nova analysis complete")
+        # Steps 2-3: Get Nova's analysis
+        nova_analysis = get_nova_fraud_analysis(transaction_data, ml_result)
         
-        # Step 4: Parse Nova's JSON response
-        try:
-            nova_analysis = json.loads(nova_response)
-        except json.JSONDecodeError:
-            # Fallback if Nova doesn't return perfect JSON
-            nova_analysis = {
-                "verdict": "REVIEW",
-                "risk_factors": ["Unable to parse Nova response"],
-                "recommended_action": "Manual review required",
-                "reasoning": nova_response
-            }
-        
-        # Step 5: Combine results
-        final_result = {
-            "transaction_id": transaction_data.get("transaction_id"),
-            "timestamp": datetime.now().isoformat(),
-            "ml_prediction": ml_result,
-            "nova_analysis": nova_analysis,
-            "final_verdict": nova_analysis.get("verdict", "REVIEW"),
-            "final_score": ml_result["fraud_score"]
-        }
+        # Step 4: Combine results
+        final_result = build_monitor_result(transaction_data, ml_result, nova_analysis)
         
         print(f"\n{'='*60}")
         print(f"✅ Analysis Complete - Verdict: {final_result['final_verdict']}")
@@ -102,4 +126,4 @@ def analyze_transaction(transaction_data):
         
     except Exception as e:
         print(f"\n❌ Error during analysis: {e}")
-        raise
\ No newline at end of file
+        raise
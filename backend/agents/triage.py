@@ -0,0 +1,117 @@
+from datetime import datetime
+from config import (
+    TRIAGE_LOW_RISK_MAX_SCORE,
+    TRIAGE_LOW_RISK_MAX_PATTERNS,
+    TRIAGE_HIGH_RISK_MIN_SCORE
+)
+
+FAST_APPROVE = "FAST_APPROVE"
+FAST_REJECT = "FAST_REJECT"
+ESCALATE = "ESCALATE_TO_LLM"
+
+
+def triage_transaction(ml_result, evidence):
+    """
+    Rule-based triage on the structured (non-LLM) agent outputs
+
+    Args:
+        ml_result (dict): Output of predict_fraud
+        evidence (dict): Output of gather_evidence
+
+    Returns:
+        dict: Triage decision; only FAST_APPROVE/FAST_REJECT carry a verdict
+    """
+
+    fraud_score = ml_result['fraud_score']
+    patterns = evidence.get('detected_patterns', [])
+
+    if fraud_score >= TRIAGE_HIGH_RISK_MIN_SCORE:
+        return {
+            'decision': FAST_REJECT,
+            'final_verdict': 'REJECTED',
+            'risk_level': 'HIGH',
+            'confidence_score': fraud_score,
+            'reasoning': (
+                f"ML fraud score {fraud_score}/100 is at or above the automatic rejection "
+                f"threshold ({TRIAGE_HIGH_RISK_MIN_SCORE})."
+            ),
+            'recommended_action': 'Reject transaction and notify user'
+        }
+
+    if fraud_score <= TRIAGE_LOW_RISK_MAX_SCORE and len(patterns) <= TRIAGE_LOW_RISK_MAX_PATTERNS:
+        return {
+            'decision': FAST_APPROVE,
+            'final_verdict': 'APPROVED',
+            'risk_level': 'LOW',
+            'confidence_score': 100 - fraud_score,
+            'reasoning': (
+                f"ML fraud score {fraud_score}/100 is at or below the automatic approval "
+                f"threshold ({TRIAGE_LOW_RISK_MAX_SCORE}) and {len(patterns)} suspicious "
+                f"patterns were detected."
+            ),
+            'recommended_action': 'Approve transaction'
+        }
+
+    return {'decision': ESCALATE}
+
+
+def build_triage_monitor_analysis(triage, ml_result):
+    """Templated stand-in for the Transaction Monitor's Nova analysis"""
+    return {
+        "verdict": triage['final_verdict'],
+        "risk_factors": [
+            f"ML risk level: {ml_result['risk_level']} ({ml_result['fraud_score']}/100)"
+        ],
+        "recommended_action": triage['recommended_action'],
+        "reasoning": triage['reasoning'],
+        "source": "triage"
+    }
+
+
+def build_triage_evidence_summary(triage, evidence):
+    """Templated stand-in for the Evidence Collector's Nova summary"""
+    profile = evidence['user_profile']
+    patterns = evidence['detected_patterns']
+    return (
+        f"Automated triage ({triage['decision']}): user has {profile['total_transactions']} "
+        f"historical transactions averaging ${profile['avg_transaction_amount']:,.2f} with "
+        f"{profile['fraud_history']} previous fraud flags. "
+        f"{len(patterns)} suspicious patterns detected"
+        f"{': ' + '; '.join(patterns) if patterns else '.'}"
+    )
+
+
+def build_triage_risk_assessment(triage, ml_result, evidence, deepfake_result=None):
+    """
+    Templated risk assessment (same keys as assess_risk) for triaged transactions
+    """
+    patterns = evidence.get('detected_patterns', [])
+    approved = triage['decision'] == FAST_APPROVE
+
+    return {
+        "final_verdict": triage['final_verdict'],
+        "confidence_score": triage['confidence_score'],
+        "risk_level": triage['risk_level'],
+        "risk_summary": triage['reasoning'],
+        "key_findings": [
+            f"ML fraud score: {ml_result['fraud_score']}/100 ({ml_result['risk_level']})",
+            f"Suspicious patterns detected: {len(patterns)}"
+        ],
+        # Fast approvals may tolerate up to TRIAGE_LOW_RISK_MAX_PATTERNS patterns
+        "risk_factors": patterns,
+        "positive_indicators": ["No behavioral anomalies detected"] if approved and not patterns else [],
+        "decision_reasoning": (
+            f"{triage['reasoning']} Transaction was decided by rule-based triage "
+            f"without LLM synthesis."
+        ),
+        "recommended_action": triage['recommended_action'],
+        "agent_consensus": "Not evaluated (rule-based triage)",
+        "triage_decision": triage['decision'],
+        "agent": "risk_assessor",
+        "timestamp": datetime.now().isoformat(),
+        "agents_analyzed": {
+            'fraud_detection': True,
+            'evidence_collection': True,
+            'biometric_verification': deepfake_result is not None and not deepfake_result.get('error')
+        }
+    }
@@ -0,0 +1,142 @@
+"""
+Micro-benchmark: detect_patterns on long user histories
+
+Compares the list-of-dicts implementation (per-item fromisoformat, list
+membership) with the columnar NumPy version over synthetic newest-first
+histories, and checks both report the same patterns. "prebuilt" times
+detect_patterns alone on columns already built by gather_evidence. The velocity counters
+are not passed, so the history-based velocity patterns are exercised.
+
+Run from backend/:
+    python -m benchmarks.bench_detect_patterns
+"""
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from agents.evidence_collector import build_history_columns, detect_patterns
+from tools.dynamodb_tools import build_user_profile
+
+HISTORY_SIZES = [10, 1000, 10000, 100000]
+REPEATS = 5
+
+DEVICES = ['Mobile', 'Laptop', 'Tablet']
+LOCATIONS = ['Tokyo', 'Sydney', 'Mumbai', 'London', 'New York']
+MERCHANTS = ['Travel', 'Groceries', 'Electronics', 'Clothing', 'Restaurants']
+
+CURRENT_TRANSACTION = {
+    'transaction_amount': 2500.00,
+    'device_type': 'Mobile',
+    'location': 'Paris',
+    'merchant_category': 'Jewelry'
+}
+
+
+def synthetic_history(size, seed=7):
+    """Newest-first transactions spaced minutes to hours apart, ending now"""
+    rng = random.Random(seed)
+    ts = datetime.now()
+    history = []
+    for i in range(size):
+        ts -= timedelta(minutes=rng.randint(1, 240))
+        history.append({
+            'Transaction_ID': f'TXN_{i}',
+            'Timestamp': ts.isoformat(),
+            'Transaction_Amount': round(rng.uniform(1, 500), 2),
+            'Device_Type': rng.choice(DEVICES),
+            'Location': rng.choice(LOCATIONS),
+            'Merchant_Category': rng.choice(MERCHANTS),
+            'Fraud_Label': 0
+        })
+    return history
+
+
+def legacy_is_within_24h(timestamp):
+    if not timestamp:
+        return False
+    try:
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        now = datetime.now(timestamp.tzinfo) if timestamp.tzinfo else datetime.now()
+        return (now - timestamp) <= timedelta(hours=24)
+    except:
+        return False
+
+
+def legacy_detect_patterns(transaction_data, user_profile, transaction_history):
+    """detect_patterns before the columnar rewrite"""
+    patterns = []
+    
+    current_amount = transaction_data.get('transaction_amount', 0)
+    avg_amount = user_profile.get('avg_transaction_amount', 0)
+    if avg_amount > 0 and current_amount > avg_amount * 5:
+        multiplier = int(current_amount / avg_amount)
+        patterns.append(f"⚠️ Amount {multiplier}x higher than user average (${avg_amount:.2f})")
+    
+    recent_24h = [t for t in transaction_history if legacy_is_within_24h(t.get('Timestamp'))]
+    if len(recent_24h) > 10:
+        patterns.append(f"⚠️ High velocity: {len(recent_24h)} transactions in last 24 hours")
+    
+    current_device = transaction_data.get('device_type')
+    if current_device and current_device not in user_profile.get('known_devices', []):
+        patterns.append(f"⚠️ New device detected: {current_device}")
+    
+    current_location = transaction_data.get('location')
+    if current_location and current_location not in user_profile.get('known_locations', []):
+        patterns.append(f"⚠️ New location: {current_location}")
+    
+    current_merchant = transaction_data.get('merchant_category')
+    if current_merchant and current_merchant not in user_profile.get('known_merchants', []):
+        patterns.append(f"ℹ️ First transaction at {current_merchant}")
+    
+    if user_profile.get('fraud_history', 0) > 0:
+        patterns.append(f"🚨 User has {user_profile['fraud_history']} previous fraud flags")
+    
+    if len(recent_24h) >= 3:
+        recent_times = [datetime.fromisoformat(t.get('Timestamp', '').replace('Z', '+00:00')) for t in recent_24h[:3]]
+        time_diff = (recent_times[0] - recent_times[-1]).total_seconds() / 3600
+        if time_diff < 1:
+            patterns.append(f"⚠️ Multiple transactions within 1 hour")
+    
+    return patterns
+
+
+def vectorized_detect_patterns(transaction_data, user_profile, transaction_history):
+    """Columnar path as gather_evidence runs it (column build included)"""
+    columns = build_history_columns(transaction_history)
+    return detect_patterns(transaction_data, user_profile, transaction_history, columns=columns)
+
+
+def time_calls(func, *args):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+if __name__ == "__main__":
+    print(f"⏱️  detect_patterns benchmark (median of {REPEATS} calls)\n")
+    print(f"{'history':>8}  {'legacy':>12}  {'columnar':>12}  {'prebuilt':>12}  {'speedup':>8}")
+    
+    for size in HISTORY_SIZES:
+        history = synthetic_history(size)
+        profile = build_user_profile('USER_BENCH', history, latest=history[0])
+        
+        expected = legacy_detect_patterns(CURRENT_TRANSACTION, profile, history)
+        actual = vectorized_detect_patterns(CURRENT_TRANSACTION, profile, history)
+        assert actual == expected, f"Pattern mismatch at {size} items:\n{expected}\n{actual}"
+        
+        legacy_ms = time_calls(legacy_detect_patterns, CURRENT_TRANSACTION, profile, history)
+        columnar_ms = time_calls(vectorized_detect_patterns, CURRENT_TRANSACTION, profile, history)
+        columns = build_history_columns(history)
+        prebuilt_ms = time_calls(
+            lambda: detect_patterns(CURRENT_TRANSACTION, profile, history, columns=columns)
+        )
+        print(f"{size:>8}  {legacy_ms:>9.3f} ms  {columnar_ms:>9.3f} ms  {prebuilt_ms:>9.3f} ms"
+              f"  {legacy_ms / columnar_ms:>7.1f}x")
+    
+    print("\n✅ Legacy and columnar patterns match for every history size")
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: per-call latency of predict_fraud
+
+Compares the old scoring path (two predict_proba calls per transaction)
+with the single-pass run_inference routine, both on the DataFrame debug
+path and on the NumPy fast path.
+
+Requires the model and label encoders in MODEL_CACHE_DIR (or S3 access).
+
+Run from backend/:
+    python -m benchmarks.bench_predict_fraud
+"""
+
+import contextlib
+import io
+import statistics
+import time
+import tools.ml_tools as ml_tools
+from tools.ml_tools import prepare_features, predict_fraud
+from tools.s3_tools import get_xgboost_model
+
+ITERATIONS = 500
+
+SAMPLE_TRANSACTION = {
+    'transaction_id': 'TXN_BENCH',
+    'user_id': 'USER_1834',
+    'transaction_amount': 2500.00,
+    'transaction_type': 'ATM Withdrawal',
+    'merchant_category': 'Electronics',
+    'card_type': 'Visa',
+    'device_type': 'Mobile',
+    'location': 'Tokyo',
+    'authentication_method': 'Password'
+}
+
+
+def legacy_predict_fraud(transaction_data):
+    """Scoring path before single-pass inference (predict_proba called twice)"""
+    model = get_xgboost_model()
+    features = prepare_features(transaction_data)
+    fraud_prob = model.predict_proba(features)[0][1]
+    confidence = max(model.predict_proba(features)[0])
+    return fraud_prob, confidence
+
+
+def dataframe_predict_fraud(transaction_data):
+    """Single-pass inference on the DataFrame (debug) path"""
+    ml_tools.DEBUG_DATAFRAME_FEATURES = True
+    try:
+        return predict_fraud(transaction_data)
+    finally:
+        ml_tools.DEBUG_DATAFRAME_FEATURES = False
+
+
+def time_calls(func, iterations=ITERATIONS):
+    """Return per-call latencies in milliseconds (stdout suppressed)"""
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(SAMPLE_TRANSACTION)  # Warm-up: loads model and encoders
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func(SAMPLE_TRANSACTION)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(f"{name:<28} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    return p50
+
+
+if __name__ == "__main__":
+    print(f"⏱️  predict_fraud micro-benchmark ({ITERATIONS} calls each)\n")
+    legacy_p50 = report("legacy (2x predict_proba)", time_calls(legacy_predict_fraud))
+    dataframe_p50 = report("single-pass (DataFrame)", time_calls(dataframe_predict_fraud))
+    numpy_p50 = report("single-pass (NumPy)", time_calls(predict_fraud))
+    print(f"\n✅ p50 reduction vs legacy: DataFrame {(1 - dataframe_p50 / legacy_p50) * 100:.1f}%"
+          f" | NumPy {(1 - numpy_p50 / legacy_p50) * 100:.1f}%")
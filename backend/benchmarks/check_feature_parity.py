@@ -0,0 +1,99 @@
+"""
+Train/serve parity check + benchmark for the derived model features
+
+Computes hour_of_day, day_of_week, is_unusual_hour, amount_deviation_ratio,
+is_high_value and is_new_device for every transaction of the synthetic
+dataset, offline with dataset_generation.py and online with the scorer's
+generate_all_features, in both serving modes:
+
+- point-in-time (POINT_IN_TIME_HISTORY_FEATURES): the --point-in-time
+  training columns vs. features served from a profile and history window of
+  the user's earlier transactions only. Any mismatch is skew; the check fails.
+- defaults: the raw training columns vs. the history defaults served without
+  the feature store. Features that need the user's history cannot match;
+  their mismatch counts are reported, not failed.
+
+Both paths use tools/feature_definitions.py. Is_Weekend is not compared:
+the training data uses the dataset's raw column, which the synthetic
+generator did not derive from the timestamp.
+
+Run from backend/:
+    python -m benchmarks.check_feature_parity [path/to/synthetic_fraud_dataset.csv]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from benchmarks.check_feature_store import earlier_user_features, history_records
+from tools.feature_engineering import generate_all_features
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'dataset-and-models'))
+from dataset_generation import enhance_transactions, load_transactions, point_in_time_history_features
+
+DATASET_PATH = "../dataset-and-models/synthetic_fraud_dataset.csv"
+PARITY_COLUMNS = ['hour_of_day', 'day_of_week', 'is_unusual_hour',
+                  'amount_deviation_ratio', 'is_high_value', 'is_new_device']
+
+# Served from user history, so unmatched by the defaults
+HISTORY_DERIVED_COLUMNS = {'amount_deviation_ratio', 'is_high_value'}
+
+
+def offline_features(df, point_in_time):
+    enhanced = df.copy()
+    if point_in_time:
+        enhanced = point_in_time_history_features(enhanced)
+    return enhance_transactions(enhanced, point_in_time=point_in_time)[PARITY_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def online_features(df, user_features):
+    """Derived features one transaction at a time, as the scorer computes them"""
+    rows = []
+    for row, features in zip(df.itertuples(index=False), user_features):
+        served = generate_all_features({
+            'transaction_amount': row.Transaction_Amount,
+            'device_type': row.Device_Type,
+            'timestamp': row.Timestamp.isoformat()
+        }, features)
+        rows.append([served[col] for col in PARITY_COLUMNS])
+    return np.array(rows, dtype=np.float64)
+
+
+def compare(offline, online, failing_columns):
+    ok = True
+    for i, col in enumerate(PARITY_COLUMNS):
+        mismatches = int((~np.isclose(offline[:, i], online[:, i])).sum())
+        if mismatches == 0:
+            status = '✅ match'
+        elif col in failing_columns:
+            status = f'❌ {mismatches} mismatches'
+            ok = False
+        else:
+            status = f'⚠️  {mismatches} mismatches (needs user history)'
+        print(f"{col:<26} {status}")
+    return ok
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH
+    df = load_transactions(path)
+    print(f"🔎 Train/serve feature parity ({len(df)} transactions)\n")
+
+    print("Point-in-time (--point-in-time training, POINT_IN_TIME_HISTORY_FEATURES serving)")
+    start = time.perf_counter()
+    offline = offline_features(df, point_in_time=True)
+    offline_seconds = time.perf_counter() - start
+    user_features = list(earlier_user_features(df, history_records(df)))
+    start = time.perf_counter()
+    online = online_features(df, user_features)
+    online_seconds = time.perf_counter() - start
+    ok = compare(offline, online, set(PARITY_COLUMNS))
+
+    print("\nDefaults (raw training columns, history defaults served)")
+    ok = compare(offline_features(df, point_in_time=False), online_features(df, [None] * len(df)),
+                 set(PARITY_COLUMNS) - HISTORY_DERIVED_COLUMNS) and ok
+
+    print(f"\noffline (vectorized):  {offline_seconds * 1e3:8.1f} ms total")
+    print(f"online (per row):      {online_seconds * 1e6 / len(df):8.1f} µs / transaction")
+
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,93 @@
+"""
+Train/serve consistency check + latency benchmark for the online feature store
+
+1. History features: Account_Balance, Previous_Fraudulent_Activity,
+   Daily_Transaction_Count, Avg_Transaction_Amount_7d,
+   Failed_Transaction_Count_7d and Card_Age from UserFeatureWindow vs. the
+   training columns of dataset_generation.py --point-in-time. Each
+   transaction is served from a profile and history window built from the
+   user's earlier transactions only, as at scoring time.
+2. Lookup latency of get_user_features.
+
+Run from backend/:
+    python -m benchmarks.check_feature_store [path/to/synthetic_fraud_dataset.csv]
+"""
+
+import os
+import statistics
+import sys
+import time
+import numpy as np
+from tools.dynamodb_tools import build_user_profile, empty_user_profile
+from tools.feature_store import UserFeatureWindow, get_user_features, parse_timestamp, store_user_features
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'dataset-and-models'))
+from dataset_generation import load_transactions, point_in_time_history_features
+
+DATASET_PATH = "../dataset-and-models/synthetic_fraud_dataset.csv"
+HISTORY_COLUMNS = ['Account_Balance', 'Previous_Fraudulent_Activity', 'Daily_Transaction_Count',
+                   'Avg_Transaction_Amount_7d', 'Failed_Transaction_Count_7d', 'Card_Age']
+LOOKUPS = 20000
+
+
+def history_records(df):
+    """Transaction items per user, oldest first, as the history queries return them"""
+    records = df.sort_values(['User_ID', 'Timestamp'], kind='stable').assign(
+        Timestamp=lambda rows: rows['Timestamp'].map(lambda ts: ts.isoformat())
+    )
+    return {user_id: rows.to_dict('records') for user_id, rows in records.groupby('User_ID')}
+
+
+def earlier_user_features(df, records):
+    """Feature store output per row, from the user's earlier transactions only"""
+    for user_id, ts in zip(df['User_ID'], df['Timestamp']):
+        as_of = parse_timestamp(ts.to_pydatetime())
+        history = [txn for txn in records[user_id] if parse_timestamp(txn['Timestamp']) < as_of]
+        profile = build_user_profile(user_id, history) if history else empty_user_profile(user_id)
+        yield UserFeatureWindow(profile, history).features(as_of)
+
+
+def online_history_features(df, records):
+    return np.array([[features[col] for col in HISTORY_COLUMNS] for features in earlier_user_features(df, records)])
+
+
+def check_history_features(df, records):
+    offline = point_in_time_history_features(df.copy())[HISTORY_COLUMNS].to_numpy(dtype=np.float64)
+    online = online_history_features(df, records)
+
+    ok = True
+    for i, col in enumerate(HISTORY_COLUMNS):
+        mismatches = int((~np.isclose(offline[:, i], online[:, i])).sum())
+        ok = ok and mismatches == 0
+        print(f"{col:<38} {'✅ match' if mismatches == 0 else f'❌ {mismatches} mismatches'}")
+    return ok
+
+
+def benchmark_lookups(df, records):
+    users = df['User_ID'].unique()[:1000]
+    for user_id in users:
+        history = records[user_id]
+        store_user_features(user_id, build_user_profile(user_id, history), history)
+
+    timestamp = df['Timestamp'].max().isoformat()
+    latencies = []
+    for i in range(LOOKUPS):
+        start = time.perf_counter()
+        get_user_features(users[i % len(users)], timestamp)
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    latencies.sort()
+    print(f"\nget_user_features lookup: p50 {statistics.median(latencies):.1f} µs"
+          f"   p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} µs")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DATASET_PATH
+    df = load_transactions(path)
+    records = history_records(df)
+    print(f"🔎 Feature store train/serve consistency check ({len(df)} transactions)\n")
+
+    ok = check_history_features(df, records)
+    benchmark_lookups(df, records)
+
+    sys.exit(0 if ok else 1)
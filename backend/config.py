@@ -9,6 +9,25 @@ LABEL_ENCODER_KEY = "artifacts/label_encoders.pkl"  # CHANGE THIS
 AWS_REGION = "us-east-1"
 NOVA_INFERENCE_ARN = "arn:aws:bedrock:us-east-1:427893119211:inference-profile/us.amazon.nova-pro-v1:0"
 
+# Bedrock client (one process-wide client shared by all agents and threads)
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "60"))
+BEDROCK_MAX_RETRIES = int(os.getenv("BEDROCK_MAX_RETRIES", "3"))
+BEDROCK_TCP_KEEPALIVE = os.getenv("BEDROCK_TCP_KEEPALIVE", "true").lower() == "true"
+
+# Nova response cache (keyed on prompt hash + model ARN + max_tokens + temperature)
+NOVA_CACHE_ENABLED = os.getenv("NOVA_CACHE_ENABLED", "true").lower() == "true"
+NOVA_CACHE_MAX_ENTRIES = int(os.getenv("NOVA_CACHE_MAX_ENTRIES", "2048"))
+NOVA_CACHE_TTL_SECONDS = float(os.getenv("NOVA_CACHE_TTL_SECONDS", "3600"))
+NOVA_CACHE_DISK_PATH = os.getenv("NOVA_CACHE_DISK_PATH")  # e.g. /tmp/nova_cache.db; unset = memory only
+NOVA_CACHE_DISK_MAX_ENTRIES = int(os.getenv("NOVA_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+# Stream long Nova generations (invoke_model_with_response_stream) so decision
+# fields can be used before the prose finishes; needs
+# bedrock:InvokeModelWithResponseStream
+NOVA_STREAMING_ENABLED = os.getenv("NOVA_STREAMING_ENABLED", "true").lower() == "true"
+
 # Model cache directory
 MODEL_CACHE_DIR = "/tmp/models"
 
@@ -61,17 +80,101 @@ CATEGORICAL_COLUMNS = [
     'Authentication_Method'
 ]
 
-# Risk thresholds for feature generation
-HIGH_VALUE_THRESHOLD = 1000.0  # Transactions above this are "high value"
-UNUSUAL_HOURS = [0, 1, 2, 3, 4, 5, 23]  # Late night/early morning
-MEDIAN_ACCOUNT_BALANCE = 50000.0  # Default account balance
-MEDIAN_CARD_AGE = 730  # 2 years in days
-MEDIAN_DAILY_TRANSACTIONS = 5
-MEDIAN_AVG_TRANSACTION_7D = 200.0
+# Encoded value for categories the label encoders never saw during training
+UNKNOWN_CATEGORY_CODE = 0
+
+# Score through the pandas DataFrame path instead of the NumPy fast path
+# (slower; only useful for inspecting prepared features while debugging)
+DEBUG_DATAFRAME_FEATURES = os.getenv("DEBUG_DATAFRAME_FEATURES", "false").lower() == "true"
+
+# User-history feature defaults, point-in-time windows and derived-feature
+# thresholds live in tools/feature_definitions.py (shared with the training
+# pipeline).
+# Score with point-in-time user-history features from the online feature
+# store. The deployed model was trained on the dataset's raw history columns,
+# which the store cannot reproduce; enable only together with a model trained
+# on `dataset_generation.py --point-in-time` output. Off: history defaults.
+POINT_IN_TIME_HISTORY_FEATURES = os.getenv("POINT_IN_TIME_HISTORY_FEATURES", "false").lower() == "true"
 
 
 # Deepfake Detection API
 DEEPFAKE_API_ENDPOINT = "https://dmqgspb3oh.execute-api.us-east-1.amazonaws.com/prod/verify"  # UPDATE THIS
 
 # DynamoDB Configuration
-DYNAMODB_TABLE_NAME = "historical-transactions"  
\ No newline at end of file
+DYNAMODB_TABLE_NAME = "historical-transactions"
+
+# Attributes fetched per DynamoDB access pattern (ProjectionExpression)
+DYNAMODB_PROJECTIONS = {
+    # Profile aggregation / backfill
+    'profile': [
+        'Transaction_ID', 'Timestamp', 'Transaction_Amount', 'Device_Type',
+        'Location', 'Merchant_Category', 'Fraud_Label', 'Account_Balance'
+    ],
+    # Evidence history window (timeline, patterns, recent transactions)
+    'history': [
+        'Transaction_ID', 'Timestamp', 'Transaction_Amount', 'Transaction_Type',
+        'Device_Type', 'Location', 'Merchant_Category', 'Fraud_Label', 'Account_Balance',
+        'Card_Age', 'Failed_Transaction_Count_7d'  # Feature store snapshot attributes
+    ],
+    # Seeding velocity counters for users with more history than one window
+    'velocity': ['Timestamp', 'Transaction_Amount']
+}
+
+# Materialized per-user profile aggregates (partition key: User_ID).
+# Read with a single GetItem and updated incrementally from the transactions
+# table's stream by profile_stream_handler (a separate Lambda). Without that
+# Lambda nothing updates the records, so a record is rebuilt from the full
+# history on the first read after PROFILE_MAX_AGE_SECONDS since its last
+# rebuild; with it, set PROFILE_MAX_AGE_SECONDS=0 (never) or a long bound.
+USER_PROFILE_TABLE_NAME = os.getenv("USER_PROFILE_TABLE_NAME", "user-profiles")
+USE_MATERIALIZED_PROFILES = os.getenv("USE_MATERIALIZED_PROFILES", "true").lower() == "true"
+PROFILE_MAX_AGE_SECONDS = int(os.getenv("PROFILE_MAX_AGE_SECONDS", "3600"))
+PROFILE_TOP_K = 10  # Categories exposed per profile (devices, locations, merchants)
+PROFILE_TRACKED_CATEGORIES = 20  # Categories tracked per profile (Space-Saving counters)
+PROFILE_UPDATE_MAX_RETRIES = 5  # Optimistic-concurrency retries per profile update
+PREFETCH_MAX_CONCURRENCY = int(os.getenv("PREFETCH_MAX_CONCURRENCY", "16"))  # Parallel user queries per batch
+
+# In-process cache of user profiles and recent-history windows (per worker).
+# TTL-only: this service does not write transactions, so it is never told
+# about new ones; the TTL bounds how stale a cached user can be.
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# Sliding-window velocity counters per user: window -> (span, bucket) seconds.
+# Re-seeded from history every time it is fetched fresh from DynamoDB (at
+# most every USER_CACHE_TTL_SECONDS per user while cached); the TTL only
+# bounds how long idle users' counters are kept.
+VELOCITY_WINDOWS = {
+    '1h': (3600, 60),
+    '24h': (86400, 900),
+    '7d': (604800, 3600)
+}
+VELOCITY_TTL_SECONDS = float(os.getenv("VELOCITY_TTL_SECONDS", "300"))
+VELOCITY_DISK_PATH = os.getenv("VELOCITY_DISK_PATH")  # e.g. /tmp/velocity.db; unset = memory only
+
+
+# Orchestrator Configuration
+# Phase 1 agents call blocking boto3/requests/XGBoost code, so they run on a
+# bounded thread pool instead of directly on the event loop
+AGENT_EXECUTOR_MAX_WORKERS = int(os.getenv("AGENT_EXECUTOR_MAX_WORKERS", "32"))
+
+# Maximum fraud-detection requests in flight per worker process; further
+# requests wait on the event loop instead of occupying threadpool slots
+MAX_CONCURRENT_DETECTIONS = int(os.getenv("MAX_CONCURRENT_DETECTIONS", "256"))
+
+# Risk Assessor starts from the structured (non-LLM) agent outputs; the agents'
+# own Nova narratives then no longer feed the decision and run alongside it
+# (include_narratives=false on the endpoints skips them).
+# False waits for the full agent results.
+EARLY_RISK_ASSESSMENT = os.getenv("EARLY_RISK_ASSESSMENT", "true").lower() == "true"
+
+# Triage: deterministic verdicts for clear-cut transactions (no Nova calls).
+# Only transactions without a verification photo are eligible.
+TRIAGE_ENABLED = os.getenv("TRIAGE_ENABLED", "true").lower() == "true"
+TRIAGE_LOW_RISK_MAX_SCORE = int(os.getenv("TRIAGE_LOW_RISK_MAX_SCORE", "20"))  # Fast-approve at or below
+TRIAGE_LOW_RISK_MAX_PATTERNS = int(os.getenv("TRIAGE_LOW_RISK_MAX_PATTERNS", "0"))
+TRIAGE_HIGH_RISK_MIN_SCORE = int(os.getenv("TRIAGE_HIGH_RISK_MIN_SCORE", "90"))  # Fast-reject at or above
+
+# Maximum transactions accepted by /fraud-detection/batch in one request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
@@ -1,7 +1,15 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from orchestrator import orchestrate_fraud_detection_sync
+from typing import List, Optional
+from orchestrator import orchestrate_fraud_detection, orchestrate_batch_scoring, stream_fraud_detection
+from config import MAX_CONCURRENT_DETECTIONS, MAX_BATCH_SIZE
+from tools.nova_tools import get_bedrock_client_stats, get_nova_cache_stats
+from tools.dynamodb_tools import get_user_cache_stats
+from tools.feature_store import get_feature_store_stats
+from tools.velocity_tools import get_velocity_stats
+import asyncio
+import json
 import uvicorn
 import numpy as np
 
@@ -17,6 +25,14 @@ def convert_to_serializable(obj):
     else:
         return obj
 
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(convert_to_serializable(data), default=str)}\n\n"
+
+# Limits in-flight orchestrations on this worker's event loop
+detection_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DETECTIONS)
+
 app = FastAPI(
     title="FraudGuard AI Agent System",
     description="Multi-agent fraud detection system with ML, behavioral analysis, and biometric verification",
@@ -59,6 +75,26 @@ class FraudDetectionRequest(BaseModel):
         }
 
 
+class BatchFraudDetectionRequest(BaseModel):
+    transactions: List[FraudDetectionRequest]
+    include_evidence: bool = False
+
+
+def build_transaction_data(request: FraudDetectionRequest):
+    """Convert a request model to the dict the agents expect"""
+    return {
+        'transaction_id': request.transaction_id,
+        'user_id': request.user_id,
+        'transaction_amount': request.transaction_amount,
+        'transaction_type': request.transaction_type,
+        'merchant_category': request.merchant_category,
+        'card_type': request.card_type,
+        'device_type': request.device_type,
+        'location': request.location,
+        'authentication_method': request.authentication_method
+    }
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -80,12 +116,17 @@ async def health_check():
     """Detailed health check"""
     return {
         "status": "healthy",
-        "agents_available": ["transaction_monitor", "evidence_collector", "deepfake_detector", "risk_assessor"]
+        "agents_available": ["transaction_monitor", "evidence_collector", "deepfake_detector", "risk_assessor"],
+        "bedrock_client": get_bedrock_client_stats(),
+        "nova_cache": get_nova_cache_stats(),
+        "user_cache": get_user_cache_stats(),
+        "feature_store": get_feature_store_stats(),
+        "velocity_counters": get_velocity_stats()
     }
 
 
 @app.post("/fraud-detection")
-def detect_fraud(request: FraudDetectionRequest):
+async def detect_fraud(request: FraudDetectionRequest, include_narratives: bool = True):
     """
     Main fraud detection endpoint
     
@@ -94,6 +135,8 @@ def detect_fraud(request: FraudDetectionRequest):
     
     Args:
         request: FraudDetectionRequest with transaction details and optional photo
+        include_narratives: Query parameter; false skips the agents' own Nova
+            narratives when they do not feed the decision (EARLY_RISK_ASSESSMENT)
         
     Returns:
         Complete fraud detection result with verdict, risk assessment, and agent analyses
@@ -101,23 +144,15 @@ def detect_fraud(request: FraudDetectionRequest):
     
     try:
         # Convert request to dict for orchestrator
-        transaction_data = {
-            'transaction_id': request.transaction_id,
-            'user_id': request.user_id,
-            'transaction_amount': request.transaction_amount,
-            'transaction_type': request.transaction_type,
-            'merchant_category': request.merchant_category,
-            'card_type': request.card_type,
-            'device_type': request.device_type,
-            'location': request.location,
-            'authentication_method': request.authentication_method
-        }
+        transaction_data = build_transaction_data(request)
         
-        # Run orchestrator (all 4 agents)
-        result = orchestrate_fraud_detection_sync(
-            transaction_data=transaction_data,
-            photo_s3_path=request.photo_s3_path
-        )
+        # Run orchestrator (all 4 agents) directly on uvicorn's event loop
+        async with detection_semaphore:
+            result = await orchestrate_fraud_detection(
+                transaction_data=transaction_data,
+                photo_s3_path=request.photo_s3_path,
+                narratives=include_narratives
+            )
         
         return convert_to_serializable(result)
         
@@ -132,6 +167,106 @@ def detect_fraud(request: FraudDetectionRequest):
         )
 
 
+@app.post("/fraud-detection/stream")
+async def detect_fraud_stream(request: FraudDetectionRequest, include_narratives: bool = True):
+    """
+    Streaming fraud detection endpoint (Server-Sent Events)
+    
+    Same pipeline as /fraud-detection, but each agent step's result is sent
+    the moment it completes (event: agent_result), followed by triage, the
+    Risk Assessor's verdict as soon as it is generated (event: decision),
+    the full risk_assessment and finally the complete result (event: complete).
+    
+    Args:
+        request: FraudDetectionRequest with transaction details and optional photo
+        include_narratives: Query parameter; false skips the agents' own Nova
+            narratives, which arrive after the decision (EARLY_RISK_ASSESSMENT)
+        
+    Returns:
+        text/event-stream response
+    """
+    
+    transaction_data = build_transaction_data(request)
+    
+    async def event_stream():
+        async with detection_semaphore:
+            try:
+                async for event, data in stream_fraud_detection(transaction_data, request.photo_s3_path, include_narratives):
+                    yield format_sse(event, data)
+            except Exception as e:
+                yield format_sse('error', {
+                    "error": "Fraud detection failed",
+                    "message": str(e),
+                    "transaction_id": request.transaction_id
+                })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/fraud-detection/batch")
+async def detect_fraud_batch(request: BatchFraudDetectionRequest):
+    """
+    Batch fraud scoring endpoint
+    
+    Scores a micro-batch of transactions with the XGBoost Transaction Monitor
+    in a single vectorized model call (no LLM agents). With include_evidence,
+    structured evidence is gathered from one bulk DynamoDB prefetch.
+    
+    Args:
+        request: BatchFraudDetectionRequest with up to MAX_BATCH_SIZE transactions;
+            items carrying photo_s3_path are rejected (422), since no
+            biometric verification runs here
+        
+    Returns:
+        Per-transaction ML predictions in the same order as the request
+    """
+    
+    if len(request.transactions) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "error": "Batch too large",
+                "message": f"Received {len(request.transactions)} transactions, maximum is {MAX_BATCH_SIZE}"
+            }
+        )
+
+    # Batch scoring runs no biometric verification: refuse photos rather than drop them
+    with_photo = [txn.transaction_id for txn in request.transactions if txn.photo_s3_path]
+    if with_photo:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Photo verification not supported in batch",
+                "message": "Send transactions with photo_s3_path to /fraud-detection",
+                "transaction_ids": with_photo
+            }
+        )
+
+    try:
+        transactions = [build_transaction_data(txn) for txn in request.transactions]
+        
+        async with detection_semaphore:
+            result = await orchestrate_batch_scoring(
+                transactions, include_evidence=request.include_evidence
+            )
+        
+        return convert_to_serializable(result)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Batch fraud detection failed",
+                "message": str(e),
+                "transaction_count": len(request.transactions)
+            }
+        )
+
+
 # Run with: uvicorn main:app --reload --host 0.0.0.0 --port 8000
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
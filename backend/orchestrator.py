@@ -1,62 +1,278 @@
 import asyncio
 import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from agents.transaction_monitor import analyze_transaction as analyze_fraud
-from agents.evidence_collector import collect_evidence
-from agents.deepfake_detector import analyze_deepfake_verification
+from agents.transaction_monitor import get_nova_fraud_analysis, build_monitor_result
+from agents.evidence_collector import (
+    gather_evidence,
+    gather_evidence_batch,
+    summarize_evidence
+)
+from agents.deepfake_detector import (
+    run_biometric_checks,
+    get_nova_deepfake_analysis,
+    build_deepfake_result
+)
 from agents.risk_assessor import assess_risk
+from agents.triage import (
+    ESCALATE,
+    triage_transaction,
+    build_triage_monitor_analysis,
+    build_triage_evidence_summary,
+    build_triage_risk_assessment
+)
+from tools.ml_tools import predict_fraud, predict_fraud_batch
+from config import (
+    AGENT_EXECUTOR_MAX_WORKERS,
+    TRIAGE_ENABLED,
+    EARLY_RISK_ASSESSMENT,
+    POINT_IN_TIME_HISTORY_FEATURES
+)
 
+# Shared pool for the blocking agent calls (created lazily, reused across requests)
+_agent_executor = None
 
-async def run_transaction_monitor(transaction_data):
-    """Run fraud detection analysis"""
-    try:
-        print("   🔍 Starting Transaction Monitor...")
-        result = analyze_fraud(transaction_data)
-        print("   ✅ Transaction Monitor complete")
-        return result
-    except Exception as e:
-        print(f"   ❌ Transaction Monitor failed: {e}")
-        return {"error": str(e), "agent": "transaction_monitor"}
+# One node of the agent dependency graph: func receives the results of `deps`
+AgentStep = namedtuple('AgentStep', ['agent', 'deps', 'func', 'skip_on_error'])
+
+# Structured (non-LLM) steps that triage decides on
+STRUCTURED_STEPS = ('evidence_collector_gather', 'transaction_monitor_ml')
+
+# Per-agent Nova narratives; with EARLY_RISK_ASSESSMENT the Risk Assessor does
+# not read them, so they overlap its call and callers may opt out
+NARRATIVE_STEPS = ('transaction_monitor_nova', 'evidence_collector_nova', 'deepfake_detector_nova')
+
+
+def get_agent_executor():
+    """Get the bounded thread pool used to run blocking agents (cached)"""
+    global _agent_executor
+    if _agent_executor is None:
+        _agent_executor = ThreadPoolExecutor(
+            max_workers=AGENT_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="fraudguard-agent"
+        )
+    return _agent_executor
+
+
+async def run_in_agent_executor(func, *args):
+    """
+    Run a blocking agent function on the agent thread pool
+
+    Returns:
+        tuple: (result, elapsed_seconds)
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    result = await loop.run_in_executor(get_agent_executor(), func, *args)
+    return result, time.perf_counter() - start
 
 
-async def run_evidence_collector(transaction_data):
-    """Run evidence collection"""
+async def run_agent_step(agent, timing_key, timings, func, *args):
+    """Run one step of an agent on the executor, returning an error dict on failure"""
+    start = time.perf_counter()
     try:
-        print("   📊 Starting Evidence Collector...")
-        result = collect_evidence(transaction_data)
-        print("   ✅ Evidence Collector complete")
+        result, elapsed = await run_in_agent_executor(func, *args)
+        print(f"   ✅ {timing_key} complete ({elapsed:.2f}s)")
         return result
     except Exception as e:
-        print(f"   ❌ Evidence Collector failed: {e}")
-        return {"error": str(e), "agent": "evidence_collector"}
+        print(f"   ❌ {agent} ({timing_key}) failed: {e}")
+        return {"error": str(e), "agent": agent}
+    finally:
+        timings[timing_key] = round(time.perf_counter() - start, 3)
+
+
+def is_error(result):
+    return isinstance(result, dict) and 'error' in result
+
+
+def history_features(evidence):
+    """User-history model features gathered with the evidence (None = defaults)"""
+    return None if is_error(evidence) else evidence.get('history_features')
+
+
+def compose_fraud_result(transaction_data, ml_result, nova_analysis=None):
+    """Transaction Monitor result from its steps (structured if no Nova analysis)"""
+    if is_error(ml_result):
+        return ml_result
+    if is_error(nova_analysis):
+        return nova_analysis
+    return build_monitor_result(transaction_data, ml_result, nova_analysis)
+
+
+def compose_evidence_result(evidence, llm_summary=None):
+    """Evidence Collector result from its steps (llm_summary stays None if missing)"""
+    if not is_error(evidence) and isinstance(llm_summary, str):
+        evidence['llm_summary'] = llm_summary
+    return evidence
+
+
+def compose_deepfake_result(photo_data, checks, nova_analysis=None):
+    """Deepfake Detector result from its steps (None when no photo was checked)"""
+    if checks is None or is_error(checks):
+        return checks
+    if is_error(nova_analysis):
+        return nova_analysis
+    return build_deepfake_result(photo_data, checks, nova_analysis)
+
+
+def build_agent_graph(transaction_data, photo_s3_path=None, on_decision=None, narratives=True):
+    """
+    Dependency graph of agent steps for one transaction
+    
+    Every step starts as soon as the steps it depends on finish: the ML
+    score starts right away with the default history features (with
+    POINT_IN_TIME_HISTORY_FEATURES it takes the features gathered with the
+    evidence instead), each agent's Nova prompt waits only for that agent's
+    structured step, and with EARLY_RISK_ASSESSMENT the Risk Assessor only
+    for the structured outputs, so the four Nova calls overlap.
+    
+    Args:
+        transaction_data (dict): Transaction details
+        photo_s3_path (str): Optional S3 path to verification photo
+        on_decision (callable): Passed to assess_risk; receives the streamed
+            decision fields before the full assessment is generated
+        narratives (bool): With EARLY_RISK_ASSESSMENT, whether to run the
+            agents' own Nova narratives (NARRATIVE_STEPS) alongside the Risk
+            Assessor; they do not feed the decision. Always run otherwise.
+    
+    Returns:
+        dict: step name -> AgentStep
+    """
+    photo_data = {**transaction_data, 'photo_s3_path': photo_s3_path}
+    
+    if POINT_IN_TIME_HISTORY_FEATURES:
+        # Scores with default history features if the fetch failed
+        ml_step = AgentStep(
+            'transaction_monitor', ('evidence_collector_gather',),
+            lambda evidence: predict_fraud(transaction_data, history_features(evidence)), False
+        )
+    else:
+        ml_step = AgentStep('transaction_monitor', (), lambda: predict_fraud(transaction_data), False)
+    
+    graph = {
+        'evidence_collector_gather': AgentStep(
+            'evidence_collector', (), lambda: gather_evidence(transaction_data), True
+        ),
+        'transaction_monitor_ml': ml_step,
+        'transaction_monitor_nova': AgentStep(
+            'transaction_monitor', ('transaction_monitor_ml',),
+            lambda ml_result: get_nova_fraud_analysis(transaction_data, ml_result), True
+        ),
+        'evidence_collector_nova': AgentStep(
+            'evidence_collector', ('evidence_collector_gather',),
+            lambda evidence: summarize_evidence(transaction_data, evidence), True
+        )
+    }
+    
+    if photo_s3_path:
+        graph['deepfake_detector_checks'] = AgentStep(
+            'deepfake_detector', (), lambda: run_biometric_checks(photo_data), True
+        )
+        graph['deepfake_detector_nova'] = AgentStep(
+            'deepfake_detector', ('deepfake_detector_checks',),
+            lambda checks: get_nova_deepfake_analysis(photo_data, checks), True
+        )
+    
+    if EARLY_RISK_ASSESSMENT:
+        deps = ('transaction_monitor_ml', 'evidence_collector_gather')
+        if photo_s3_path:
+            deps += ('deepfake_detector_checks',)
+        
+        def risk_step(ml_result, evidence, checks=None):
+            return assess_risk(
+                transaction_data,
+                compose_fraud_result(transaction_data, ml_result),
+                evidence,
+                compose_deepfake_result(photo_data, checks),
+                on_decision
+            )
+    else:
+        deps = ('transaction_monitor_ml', 'transaction_monitor_nova',
+                'evidence_collector_gather', 'evidence_collector_nova')
+        if photo_s3_path:
+            deps += ('deepfake_detector_checks', 'deepfake_detector_nova')
+        
+        def risk_step(ml_result, monitor_nova, evidence, evidence_summary, checks=None, deepfake_nova=None):
+            return assess_risk(
+                transaction_data,
+                compose_fraud_result(transaction_data, ml_result, monitor_nova),
+                compose_evidence_result(evidence, evidence_summary),
+                compose_deepfake_result(photo_data, checks, deepfake_nova),
+                on_decision
+            )
+    
+    graph['risk_assessor'] = AgentStep('risk_assessor', deps, risk_step, False)
+    
+    if EARLY_RISK_ASSESSMENT and not narratives:
+        for name in NARRATIVE_STEPS:
+            graph.pop(name, None)
+    return graph
 
 
-async def run_deepfake_detector(transaction_data, photo_s3_path):
-    """Run deepfake detection (optional - only if photo provided)"""
-    if not photo_s3_path:
-        print("   ⏭️  No photo provided, skipping Deepfake Detector")
-        return None
+def emit_event(events, event, data):
+    """Push a progress event for streaming clients (no-op without a queue)"""
+    if events is not None:
+        events.put_nowait((event, data))
+
+
+async def run_agent_graph(graph, timings, completed=None, events=None):
+    """
+    Run every step of an agent graph as soon as its dependencies finish
     
-    try:
-        print("   🎭 Starting Deepfake Detector...")
-        result = analyze_deepfake_verification({
-            **transaction_data,
-            'photo_s3_path': photo_s3_path
+    Args:
+        graph (dict): step name -> AgentStep
+        timings (dict): Per-step wall-clock seconds (filled in)
+        completed (dict): Results of steps that already ran (not re-run)
+        events (asyncio.Queue): Receives an 'agent_result' event per finished step
+        
+    Returns:
+        dict: step name -> result (error dict if the step failed or was skipped)
+    """
+    loop = asyncio.get_running_loop()
+    tasks = {}
+    
+    async def run_step(name):
+        step = graph[name]
+        inputs = [await tasks[dep] for dep in step.deps]
+        failed = [dep for dep, result in zip(step.deps, inputs) if is_error(result)]
+        if failed and step.skip_on_error:
+            print(f"   ⏭️  Skipping {name}: {', '.join(failed)} failed")
+            result = {"error": f"Skipped: {', '.join(failed)} failed", "agent": step.agent}
+        else:
+            result = await run_agent_step(step.agent, name, timings, step.func, *inputs)
+        emit_event(events, 'agent_result', {
+            'step': name,
+            'agent': step.agent,
+            'elapsed_seconds': timings.get(name),
+            'result': result
         })
-        print("   ✅ Deepfake Detector complete")
         return result
-    except Exception as e:
-        print(f"   ❌ Deepfake Detector failed: {e}")
-        return {"error": str(e), "agent": "deepfake_detector"}
+    
+    # Every task exists before any runs, so steps may await each other freely
+    for name in graph:
+        if completed and name in completed:
+            tasks[name] = loop.create_future()
+            tasks[name].set_result(completed[name])
+        else:
+            tasks[name] = asyncio.ensure_future(run_step(name))
+    
+    return dict(zip(tasks, await asyncio.gather(*tasks.values())))
 
 
-async def orchestrate_fraud_detection(transaction_data, photo_s3_path=None):
+async def orchestrate_fraud_detection(transaction_data, photo_s3_path=None, events=None, narratives=True):
     """
     Main orchestrator - runs all agents and synthesizes results
     
     Args:
         transaction_data (dict): Transaction details from Lambda
         photo_s3_path (str): Optional S3 path to verification photo
+        events (asyncio.Queue): Optional queue receiving progress events
+            (agent_result per step, triage, decision, risk_assessment) as
+            they happen
+        narratives (bool): False skips the per-agent Nova narratives when
+            they do not feed the decision (see build_agent_graph)
         
     Returns:
         dict: Complete fraud detection result
@@ -72,46 +288,75 @@ async def orchestrate_fraud_detection(transaction_data, photo_s3_path=None):
     print("="*80 + "\n")
     
     start_time = datetime.now()
+    agent_timings = {}
+    triage = None
     
-    # =========================================================================
-    # PHASE 1: Run Agents 1, 2, 3 in parallel
-    # =========================================================================
-    print("📡 PHASE 1: Running Specialized Agents (Parallel)\n")
-    
-    tasks = [
-        run_transaction_monitor(transaction_data),
-        run_evidence_collector(transaction_data),
-        run_deepfake_detector(transaction_data, photo_s3_path)
-    ]
+    loop = asyncio.get_running_loop()
+    graph_start = time.perf_counter()
     
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    def on_decision(decision):
+        # Called from the Risk Assessor's worker thread mid-generation
+        agent_timings['risk_assessor_decision'] = round(time.perf_counter() - graph_start, 3)
+        print(f"   ⚡ Decision streamed: {decision.get('final_verdict')} ({decision.get('risk_level')})")
+        loop.call_soon_threadsafe(emit_event, events, 'decision', decision)
     
-    fraud_result = results[0]
-    evidence_result = results[1]
-    deepfake_result = results[2]
+    graph = build_agent_graph(transaction_data, photo_s3_path, on_decision, narratives)
     
-    print("\n" + "="*80)
-    print("✅ PHASE 1 Complete - All Agents Finished")
-    print("="*80 + "\n")
+    # =========================================================================
+    # STEP 1: Structured agent steps + triage (no Nova for clear-cut cases)
+    # =========================================================================
+    completed = None
+    if TRIAGE_ENABLED and not photo_s3_path:
+        print("📡 Running structured agent steps for triage\n")
+        completed = await run_agent_graph(
+            {name: graph[name] for name in STRUCTURED_STEPS}, agent_timings, events=events
+        )
+        ml_result = completed['transaction_monitor_ml']
+        evidence = completed['evidence_collector_gather']
+        
+        if is_error(ml_result) or is_error(evidence):
+            triage = {'decision': ESCALATE}
+        else:
+            triage = triage_transaction(ml_result, evidence)
+        print(f"   🚦 Triage decision: {triage['decision']}")
+        emit_event(events, 'triage', triage)
     
     # =========================================================================
-    # PHASE 2: Agent 4 - Risk Assessor (synthesizes all results)
+    # STEP 2: Agent graph - Nova prompts and risk synthesis as inputs are ready
     # =========================================================================
-    print("📡 PHASE 2: Risk Assessment & Final Decision\n")
+    if triage is not None and triage['decision'] != ESCALATE:
+        print(f"   ⏭️  Triage verdict ({triage['decision']}), skipping Nova analysis and risk synthesis")
+        monitor_analysis = build_triage_monitor_analysis(triage, ml_result)
+        fraud_result = build_monitor_result(transaction_data, ml_result, monitor_analysis)
+        evidence_result = compose_evidence_result(evidence, build_triage_evidence_summary(triage, evidence))
+        deepfake_result = None
+        risk_assessment = build_triage_risk_assessment(triage, ml_result, evidence_result)
+    else:
+        print("📡 Running agent dependency graph\n")
+        results = await run_agent_graph(graph, agent_timings, completed, events)
+        
+        fraud_result = compose_fraud_result(
+            transaction_data, results['transaction_monitor_ml'], results.get('transaction_monitor_nova')
+        )
+        evidence_result = compose_evidence_result(
+            results['evidence_collector_gather'], results.get('evidence_collector_nova')
+        )
+        deepfake_result = compose_deepfake_result(
+            {**transaction_data, 'photo_s3_path': photo_s3_path},
+            results.get('deepfake_detector_checks'),
+            results.get('deepfake_detector_nova')
+        )
+        risk_assessment = results['risk_assessor']
     
-    risk_assessment = assess_risk(
-        transaction_data,
-        fraud_result,
-        evidence_result,
-        deepfake_result
-    )
+    agent_timings['agent_graph_total'] = round(time.perf_counter() - graph_start, 3)
+    emit_event(events, 'risk_assessment', risk_assessment)
     
     print("\n" + "="*80)
-    print("✅ PHASE 2 Complete - Risk Assessment Done")
+    print("✅ All Agents and Risk Assessment Complete")
     print("="*80 + "\n")
     
     # =========================================================================
-    # PHASE 3: Build complete response
+    # STEP 3: Build complete response
     # =========================================================================
     end_time = datetime.now()
     processing_time = (end_time - start_time).total_seconds()
@@ -121,6 +366,8 @@ async def orchestrate_fraud_detection(transaction_data, photo_s3_path=None):
         "user_id": transaction_data.get('user_id'),
         "timestamp": end_time.isoformat(),
         "processing_time_seconds": round(processing_time, 2),
+        "agent_timings_seconds": agent_timings,
+        "triage_decision": triage['decision'] if triage else None,
         
         # Final comprehensive assessment from Agent 4
         "risk_assessment": risk_assessment,
@@ -156,6 +403,99 @@ async def orchestrate_fraud_detection(transaction_data, photo_s3_path=None):
     return complete_result
 
 
+async def orchestrate_batch_scoring(transactions, include_evidence=False):
+    """
+    Batch orchestrator - scores many transactions with the XGBoost model
+    
+    Only the Transaction Monitor's ML step runs here; the LLM agents are
+    per-transaction and stay on the single-transaction pipeline.
+    
+    Args:
+        transactions (list): Transaction dicts from Lambda
+        include_evidence (bool): Also gather structured evidence, with one
+            de-duplicated DynamoDB prefetch for all users in the batch
+        
+    Returns:
+        dict: Per-transaction ML predictions in input order
+    """
+    
+    print(f"\n📦 ORCHESTRATOR: Batch scoring {len(transactions)} transactions")
+    
+    start_time = datetime.now()
+    
+    evidence = None
+    if include_evidence and POINT_IN_TIME_HISTORY_FEATURES:
+        # Evidence first: the batch is scored with the history features gathered with it
+        evidence, evidence_elapsed = await run_in_agent_executor(gather_evidence_batch, transactions)
+        print(f"   📚 Batch evidence gathered in {evidence_elapsed:.3f}s")
+        predictions, elapsed = await run_in_agent_executor(
+            predict_fraud_batch, transactions, [history_features(e) for e in evidence]
+        )
+    elif include_evidence:
+        (evidence, evidence_elapsed), (predictions, elapsed) = await asyncio.gather(
+            run_in_agent_executor(gather_evidence_batch, transactions),
+            run_in_agent_executor(predict_fraud_batch, transactions)
+        )
+        print(f"   📚 Batch evidence gathered in {evidence_elapsed:.3f}s")
+    else:
+        predictions, elapsed = await run_in_agent_executor(predict_fraud_batch, transactions)
+    
+    results = [
+        {
+            "transaction_id": txn.get('transaction_id'),
+            "user_id": txn.get('user_id'),
+            "ml_prediction": prediction
+        }
+        for txn, prediction in zip(transactions, predictions)
+    ]
+    if evidence is not None:
+        for result, txn_evidence in zip(results, evidence):
+            result["evidence"] = txn_evidence
+    
+    end_time = datetime.now()
+    processing_time = (end_time - start_time).total_seconds()
+    
+    print(f"✅ Batch scoring complete: {len(predictions)} transactions in {elapsed:.3f}s\n")
+    
+    return {
+        "timestamp": end_time.isoformat(),
+        "processing_time_seconds": round(processing_time, 3),
+        "transaction_count": len(predictions),
+        "results": results
+    }
+
+
+async def stream_fraud_detection(transaction_data, photo_s3_path=None, narratives=True):
+    """
+    Run orchestrate_fraud_detection, yielding progress as it happens
+    
+    With EARLY_RISK_ASSESSMENT the decision is streamed before the per-agent
+    Nova narratives, which follow as agent_result events.
+    
+    Yields:
+        tuple: (event, data) - 'agent_result' for each finished agent step,
+            'triage', 'decision' (final_verdict, risk_level and
+            recommended_action, as soon as the Risk Assessor has generated
+            them), 'risk_assessment', then 'complete' with the full result
+    """
+    events = asyncio.Queue()
+    task = asyncio.ensure_future(orchestrate_fraud_detection(transaction_data, photo_s3_path, events, narratives))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    
+    try:
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+        
+        yield 'complete', task.result()
+    finally:
+        # Client went away: stop scheduling further agent steps
+        if not task.done():
+            task.cancel()
+
+
 # Sync wrapper for FastAPI
 def orchestrate_fraud_detection_sync(transaction_data, photo_s3_path=None):
     """Synchronous wrapper for orchestrator"""
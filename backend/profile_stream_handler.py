@@ -0,0 +1,47 @@
+"""
+DynamoDB Streams handler that keeps the materialized user profiles current
+
+Deployed as a Lambda on the transactions table's stream (NEW_IMAGE view), so
+every transaction written to history is folded into the user's profile
+record, whichever service wrote it. The scoring service then reads profiles
+with a single GetItem.
+
+Lambda handler: profile_stream_handler.handler (see README)
+"""
+
+from boto3.dynamodb.types import TypeDeserializer
+from tools.dynamodb_tools import update_profile_aggregates
+
+_deserializer = TypeDeserializer()
+
+
+def decode_image(image):
+    """Stream record image (DynamoDB JSON) -> transaction item"""
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+
+def handler(event, context):
+    """
+    Apply inserted transactions to the user-profile aggregates
+
+    Only INSERTs are applied: the aggregates are append-only. Processing
+    stops at the first failed record and reports it (ReportBatchItemFailures),
+    so the retry resumes there without re-applying the records before it.
+
+    Returns:
+        dict: {'batchItemFailures': [{'itemIdentifier': sequence number}]}
+    """
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+
+        stream_record = record['dynamodb']
+        try:
+            transaction = decode_image(stream_record['NewImage'])
+            if transaction.get('User_ID'):
+                update_profile_aggregates(transaction)
+        except Exception as e:
+            print(f"❌ Profile update failed at {stream_record['SequenceNumber']}: {e}")
+            return {'batchItemFailures': [{'itemIdentifier': stream_record['SequenceNumber']}]}
+
+    return {'batchItemFailures': []}
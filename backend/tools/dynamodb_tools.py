@@ -1,168 +1,765 @@
 import boto3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
 from decimal import Decimal
-from config import DYNAMODB_TABLE_NAME, AWS_REGION
+from config import (
+    DYNAMODB_TABLE_NAME,
+    AWS_REGION,
+    USER_PROFILE_TABLE_NAME,
+    USE_MATERIALIZED_PROFILES,
+    PROFILE_MAX_AGE_SECONDS,
+    PROFILE_TOP_K,
+    PROFILE_TRACKED_CATEGORIES,
+    PROFILE_UPDATE_MAX_RETRIES,
+    USER_CACHE_ENABLED,
+    USER_CACHE_MAX_ENTRIES,
+    USER_CACHE_TTL_SECONDS,
+    DYNAMODB_PROJECTIONS,
+    PREFETCH_MAX_CONCURRENCY,
+    VELOCITY_WINDOWS
+)
+from tools.cache_tools import LRUCache
+from tools.velocity_tools import load_user_velocity, seed_user_velocity, get_user_velocity, discard_user_velocity
 
-# Cache table resource
+# Cache table resources
+_resource = None
 _table = None
+_profile_table = None
+_client = None
+
+# Hot-user caches keyed by user_id (cached values are shared; treat as read-only).
+# TTL-only: transactions are written by other processes (the submit Lambda),
+# so new writes show up once an entry expires (USER_CACHE_TTL_SECONDS).
+_profile_cache = LRUCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+_history_cache = LRUCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)  # (limit, newest-first items)
+
+# Transaction attribute -> profile record counter map
+PROFILE_CATEGORY_FIELDS = {
+    'Device_Type': 'device_counts',
+    'Location': 'location_counts',
+    'Merchant_Category': 'merchant_counts'
+}
+
+def get_dynamodb_resource():
+    """Get DynamoDB service resource (cached)"""
+    global _resource
+    if _resource is None:
+        _resource = boto3.resource('dynamodb', region_name=AWS_REGION)
+    return _resource
+
 
 def get_dynamodb_table():
     """Get DynamoDB table resource (cached)"""
     global _table
     if _table is None:
-        dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-        _table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+        _table = get_dynamodb_resource().Table(DYNAMODB_TABLE_NAME)
     return _table
 
 
+def get_cached_history(user_id, limit):
+    """
+    Newest-first history window from cache, or None
+    
+    A cached window fetched with a larger limit (or one holding the user's
+    entire history) can serve any smaller request.
+    """
+    if not USER_CACHE_ENABLED:
+        return None
+    cached = _history_cache.get(user_id)
+    if cached is None:
+        return None
+    cached_limit, items = cached
+    if limit <= cached_limit or len(items) < cached_limit:
+        return items[:limit]
+    return None
+
+
+def get_user_cache_stats():
+    """Hit ratio and approximate memory footprint of the user caches"""
+    return {
+        'enabled': USER_CACHE_ENABLED,
+        'profiles': {**_profile_cache.stats(), 'memory_bytes': _profile_cache.memory_bytes()},
+        'history': {**_history_cache.stats(), 'memory_bytes': _history_cache.memory_bytes()}
+    }
+
+
+# Typed attributes decoded from raw DynamoDB items (everything else is a string)
+NUMERIC_ATTRIBUTES = {
+    'Transaction_Amount': float,
+    'Account_Balance': float,
+    'Fraud_Label': int,
+    'IP_Address_Flag': int,
+    'Previous_Fraudulent_Activity': int,
+    'Daily_Transaction_Count': int,
+    'Avg_Transaction_Amount_7d': float,
+    'Failed_Transaction_Count_7d': int,
+    'Card_Age': int,
+    'Transaction_Distance': float,
+    'Risk_Score': float,
+    'Is_Weekend': int
+}
+
+TRANSACTION_RECORD_FIELDS = sorted(
+    {'User_ID'} | set(NUMERIC_ATTRIBUTES)
+    | {attr for attrs in DYNAMODB_PROJECTIONS.values() for attr in attrs}
+)
+_RECORD_FIELD_INDEX = {name: i for i, name in enumerate(TRANSACTION_RECORD_FIELDS)}
+
+
+class TransactionRecord(namedtuple('TransactionRecord', TRANSACTION_RECORD_FIELDS)):
+    """
+    Compact, typed transaction item (tuple instead of a dict of Decimals)
+    
+    Supports `.get(name, default)` so it can stand in for resource items;
+    attributes not in the query's projection are None.
+    """
+    __slots__ = ()
+    
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+
+def decode_item(raw_item):
+    """Decode a low-level DynamoDB item straight into a TransactionRecord"""
+    values = [None] * len(TRANSACTION_RECORD_FIELDS)
+    for name, attribute in raw_item.items():
+        index = _RECORD_FIELD_INDEX.get(name)
+        if index is None:
+            continue
+        if 'N' in attribute:
+            values[index] = NUMERIC_ATTRIBUTES.get(name, float)(float(attribute['N']))
+        elif 'S' in attribute:
+            values[index] = attribute['S']
+        elif 'BOOL' in attribute:
+            values[index] = attribute['BOOL']
+    return TransactionRecord._make(values)
+
+
+def get_dynamodb_client():
+    """Get low-level DynamoDB client (cached); returns raw items without Decimal conversion"""
+    global _client
+    if _client is None:
+        _client = boto3.client('dynamodb', region_name=AWS_REGION)
+    return _client
+
+
+def query_user_records(user_id, access_pattern, newest_first=False, limit=None, cutoff=None):
+    """
+    Query a user's transactions via the UserIdIndex GSI with a projection
+    
+    Args:
+        user_id (str): User identifier
+        access_pattern (str): Key of config.DYNAMODB_PROJECTIONS
+        newest_first (bool): Sort descending by Timestamp
+        limit (int): Maximum records (None = all, paginated)
+        cutoff (str): Only transactions with Timestamp >= cutoff (ISO string)
+        
+    Returns:
+        list: TransactionRecord tuples
+    """
+    client = get_dynamodb_client()
+    
+    # Placeholders for every attribute: Timestamp and Location are reserved words
+    attributes = DYNAMODB_PROJECTIONS[access_pattern]
+    names = {f'#p{i}': attr for i, attr in enumerate(attributes)}
+    projection = ', '.join(names)
+    
+    key_condition = 'User_ID = :uid'
+    values = {':uid': {'S': user_id}}
+    if cutoff:
+        names['#ts'] = 'Timestamp'
+        key_condition += ' AND #ts >= :cutoff'
+        values[':cutoff'] = {'S': cutoff}
+    
+    query_kwargs = {
+        'TableName': DYNAMODB_TABLE_NAME,
+        'IndexName': 'UserIdIndex',
+        'KeyConditionExpression': key_condition,
+        'ProjectionExpression': projection,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': not newest_first
+    }
+    
+    records = []
+    start_key = None
+    while True:
+        page_kwargs = dict(query_kwargs)
+        if limit is not None:
+            page_kwargs['Limit'] = limit - len(records)
+        if start_key is not None:
+            page_kwargs['ExclusiveStartKey'] = start_key
+        
+        response = client.query(**page_kwargs)
+        records.extend(decode_item(item) for item in response.get('Items', []))
+        
+        # Only paginate if we haven't hit the limit
+        start_key = response.get('LastEvaluatedKey')
+        if start_key is None or (limit is not None and len(records) >= limit):
+            return records
+
+
+def get_profile_table():
+    """Get materialized user-profile table resource (cached)"""
+    global _profile_table
+    if _profile_table is None:
+        _profile_table = get_dynamodb_resource().Table(USER_PROFILE_TABLE_NAME)
+    return _profile_table
+
+
+def empty_user_profile(user_id):
+    """Profile returned for users without history (or on read errors)"""
+    return {
+        'user_id': user_id,
+        'total_transactions': 0,
+        'avg_transaction_amount': 0,
+        'known_devices': [],
+        'known_locations': [],
+        'known_merchants': [],
+        'fraud_history': 0
+    }
+
+
+def query_all_user_transactions(user_id, newest_first=False, access_pattern='profile'):
+    """
+    Fetch every transaction for a user via the UserIdIndex GSI (paginated)
+    """
+    return query_user_records(user_id, access_pattern, newest_first=newest_first)
+
+
+def build_user_profile(user_id, transactions, latest=None):
+    """
+    Aggregate a user profile from transaction items
+    
+    Args:
+        user_id (str): User identifier
+        transactions (list): DynamoDB items for the user
+        latest (dict): Most recent item (for account balance); defaults to the last item
+    """
+    if not transactions:
+        return empty_user_profile(user_id)
+    
+    if latest is None:
+        latest = transactions[-1]
+    
+    # Calculate statistics
+    amounts = [float(t.get('Transaction_Amount', 0)) for t in transactions]
+    devices = list(set([t.get('Device_Type') for t in transactions if t.get('Device_Type')]))
+    locations = list(set([t.get('Location') for t in transactions if t.get('Location')]))
+    merchants = list(set([t.get('Merchant_Category') for t in transactions if t.get('Merchant_Category')]))
+    fraud_count = sum([1 for t in transactions if t.get('Fraud_Label', 0) == 1])
+    
+    return {
+        'user_id': user_id,
+        'total_transactions': len(transactions),
+        'avg_transaction_amount': sum(amounts) / len(amounts) if amounts else 0,
+        'min_transaction': min(amounts) if amounts else 0,
+        'max_transaction': max(amounts) if amounts else 0,
+        'known_devices': devices[:10],  # Limit to top 10
+        'known_locations': locations[:10],
+        'known_merchants': merchants[:10],
+        'fraud_history': fraud_count,
+        'account_balance': float(latest.get('Account_Balance', 0))
+    }
+
+
+def to_decimal(value):
+    """Convert a number to Decimal for DynamoDB writes"""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def new_profile_record(user_id):
+    """Empty materialized profile record"""
+    return {
+        'User_ID': user_id,
+        'version': 0,
+        'rebuilt_at': 0,  # Epoch seconds of the last full rebuild from history
+        'txn_count': 0,
+        'amount_sum': Decimal(0),
+        'amount_min': None,
+        'amount_max': None,
+        'fraud_count': 0,
+        'account_balance': Decimal(0),
+        'last_timestamp': '',
+        'device_counts': {},
+        'location_counts': {},
+        'merchant_counts': {}
+    }
+
+
+def increment_top_k(counts, key, max_tracked=PROFILE_TRACKED_CATEGORIES):
+    """
+    Space-Saving counter update: keeps at most max_tracked categories
+    
+    A new category arriving when the map is full replaces the least frequent
+    one and inherits its count + 1, so frequent categories are never lost.
+    """
+    if key in counts:
+        counts[key] += 1
+    elif len(counts) < max_tracked:
+        counts[key] = 1
+    else:
+        evicted = min(counts, key=counts.get)
+        counts[key] = counts.pop(evicted) + 1
+
+
+def apply_transaction_to_profile(record, transaction):
+    """
+    Fold one transaction item into a profile record (in place)
+    
+    Args:
+        record (dict): Materialized profile record
+        transaction (dict): Transaction item (DynamoDB attribute names)
+    """
+    amount = to_decimal(transaction.get('Transaction_Amount', 0))
+    
+    record['txn_count'] += 1
+    record['amount_sum'] += amount
+    record['amount_min'] = amount if record['amount_min'] is None else min(record['amount_min'], amount)
+    record['amount_max'] = amount if record['amount_max'] is None else max(record['amount_max'], amount)
+    if transaction.get('Fraud_Label', 0) == 1:
+        record['fraud_count'] += 1
+    
+    timestamp = transaction.get('Timestamp') or ''
+    if timestamp >= record['last_timestamp']:
+        record['last_timestamp'] = timestamp
+        record['account_balance'] = to_decimal(transaction.get('Account_Balance', 0))
+    
+    for attribute, counts_field in PROFILE_CATEGORY_FIELDS.items():
+        value = transaction.get(attribute)
+        if value:
+            increment_top_k(record[counts_field], value)
+    
+    return record
+
+
+def top_k_categories(counts, k=PROFILE_TOP_K):
+    """Most frequent categories first"""
+    return [key for key, _ in sorted(counts.items(), key=lambda kv: -kv[1])[:k]]
+
+
+def profile_from_record(record):
+    """Convert a materialized profile record to the get_user_profile shape"""
+    count = int(record.get('txn_count', 0))
+    if count == 0:
+        return empty_user_profile(record['User_ID'])
+    
+    return {
+        'user_id': record['User_ID'],
+        'total_transactions': count,
+        'avg_transaction_amount': float(record['amount_sum']) / count,
+        'min_transaction': float(record['amount_min']),
+        'max_transaction': float(record['amount_max']),
+        'known_devices': top_k_categories(record.get('device_counts', {})),
+        'known_locations': top_k_categories(record.get('location_counts', {})),
+        'known_merchants': top_k_categories(record.get('merchant_counts', {})),
+        'fraud_history': int(record.get('fraud_count', 0)),
+        'account_balance': float(record.get('account_balance', 0))
+    }
+
+
+def save_profile_record(record, expected_version):
+    """
+    Conditionally write a profile record (optimistic concurrency on `version`)
+    
+    Returns:
+        bool: False if another writer updated the record first
+    """
+    record['version'] = expected_version + 1
+    condition = (
+        'attribute_not_exists(User_ID)' if expected_version == 0
+        else 'version = :expected'
+    )
+    kwargs = {'Item': record, 'ConditionExpression': condition}
+    if expected_version:
+        kwargs['ExpressionAttributeValues'] = {':expected': expected_version}
+    
+    try:
+        get_profile_table().put_item(**kwargs)
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def is_profile_record_stale(record, now=None):
+    """
+    True if the record's last full rebuild is older than PROFILE_MAX_AGE_SECONDS
+    
+    Incremental updates do not reset the age: they are only applied while
+    profile_stream_handler is deployed. 0 disables rebuilds.
+    """
+    if not PROFILE_MAX_AGE_SECONDS:
+        return False
+    now = time.time() if now is None else now
+    return now - float(record.get('rebuilt_at') or 0) > PROFILE_MAX_AGE_SECONDS
+
+
+def rebuild_profile_record(user_id, stale_record=None):
+    """
+    Rebuild a materialized profile from the user's full history
+    
+    Args:
+        user_id (str): User identifier
+        stale_record (dict): Existing record to replace (None = first backfill)
+        
+    Returns:
+        dict: The rebuilt profile record (not written if another writer
+            updated the record meanwhile)
+    """
+    record = new_profile_record(user_id)
+    record['rebuilt_at'] = int(time.time())
+    for transaction in query_all_user_transactions(user_id):
+        apply_transaction_to_profile(record, transaction)
+    expected_version = int(stale_record.get('version', 0)) if stale_record else 0
+    save_profile_record(record, expected_version)
+    return record
+
+
+def update_profile_aggregates(transaction):
+    """
+    Incrementally update the user's materialized profile with one transaction
+    
+    Read-modify-write guarded by a version condition, retried on conflicts.
+    Called by profile_stream_handler for every transaction written to history.
+    """
+    user_id = transaction['User_ID']
+    table = get_profile_table()
+    
+    for _ in range(PROFILE_UPDATE_MAX_RETRIES):
+        response = table.get_item(Key={'User_ID': user_id}, ConsistentRead=True)
+        record = response.get('Item')
+        if record is None:
+            # First write for this user: start from existing history
+            record = new_profile_record(user_id)
+            record['rebuilt_at'] = int(time.time())
+            for past in query_all_user_transactions(user_id):
+                if past.get('Transaction_ID') != transaction.get('Transaction_ID'):
+                    apply_transaction_to_profile(record, past)
+        
+        expected_version = int(record.get('version', 0))
+        apply_transaction_to_profile(record, transaction)
+        if save_profile_record(record, expected_version):
+            return record
+    
+    raise RuntimeError(f"Profile update for {user_id} kept conflicting after {PROFILE_UPDATE_MAX_RETRIES} retries")
+
+
+def get_materialized_profile(user_id):
+    """
+    Read a user's profile with a single GetItem
+    
+    Backfilled from history on first read, and rebuilt once older than
+    PROFILE_MAX_AGE_SECONDS (if set).
+    """
+    response = get_profile_table().get_item(Key={'User_ID': user_id})
+    record = response.get('Item')
+    if record is None:
+        print(f"   🔧 No materialized profile for {user_id}, backfilling from history")
+        record = rebuild_profile_record(user_id)
+    elif is_profile_record_stale(record):
+        print(f"   🔧 Materialized profile for {user_id} is stale, rebuilding from history")
+        record = rebuild_profile_record(user_id, stale_record=record)
+    return profile_from_record(record)
+
+
+def batch_get_profile_records(user_ids):
+    """
+    Fetch materialized profile records with BatchGetItem (100 keys per call)
+    
+    Returns:
+        dict: user_id -> record, for users that have one
+    """
+    resource = get_dynamodb_resource()
+    records = {}
+    
+    for start in range(0, len(user_ids), 100):
+        request = {
+            USER_PROFILE_TABLE_NAME: {'Keys': [{'User_ID': uid} for uid in user_ids[start:start + 100]]}
+        }
+        attempt = 0
+        while request:
+            response = resource.batch_get_item(RequestItems=request)
+            for record in response.get('Responses', {}).get(USER_PROFILE_TABLE_NAME, []):
+                records[record['User_ID']] = record
+            
+            # Retry throttled keys with exponential backoff
+            request = response.get('UnprocessedKeys') or None
+            if request:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    
+    return records
+
+
+def get_user_profiles_batch(user_ids):
+    """
+    Profiles for many users: cache first, then BatchGetItem, backfilling
+    users without a fresh materialized record in parallel
+    
+    Returns:
+        dict: user_id -> profile
+    """
+    profiles = {}
+    missing = []
+    for user_id in user_ids:
+        cached = _profile_cache.get(user_id) if USER_CACHE_ENABLED else None
+        if cached is not None:
+            profiles[user_id] = cached
+        else:
+            missing.append(user_id)
+    
+    if not missing:
+        return profiles
+    
+    print(f"   📊 Batch-fetching {len(missing)} profiles...")
+    now = time.time()
+    records = {
+        user_id: record for user_id, record in batch_get_profile_records(missing).items()
+        if not is_profile_record_stale(record, now)
+    }
+    for user_id, record in records.items():
+        profiles[user_id] = profile_from_record(record)
+    
+    to_backfill = [uid for uid in missing if uid not in records]
+    if to_backfill:
+        with ThreadPoolExecutor(max_workers=PREFETCH_MAX_CONCURRENCY) as pool:
+            for user_id, profile in zip(to_backfill, pool.map(get_user_profile, to_backfill)):
+                profiles[user_id] = profile
+    
+    if USER_CACHE_ENABLED:
+        for user_id in records:
+            _profile_cache.set(user_id, profiles[user_id])
+    
+    return profiles
+
+
+def prefetch_user_evidence_data(user_ids, history_limit=100, recent_hours=24):
+    """
+    Bulk prefetch of evidence data for a batch of transactions
+    
+    User IDs are de-duplicated and queried in parallel (bounded by
+    PREFETCH_MAX_CONCURRENCY), so batch latency tracks the slowest user
+    rather than the sum over rows.
+    
+    Args:
+        user_ids (list): User IDs from the batch (duplicates allowed)
+        history_limit (int): Size of the newest-first history window
+        recent_hours (int): Window for the recent transaction count
+        
+    Returns:
+        dict: user_id -> (profile, history, recent_count), as
+            get_user_evidence_data; users whose fetch failed are omitted
+    """
+    unique_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+    if not unique_ids:
+        return {}
+    
+    print(f"   📦 Prefetching evidence data for {len(unique_ids)} users...")
+    
+    profiles = {}
+    if USE_MATERIALIZED_PROFILES:
+        try:
+            profiles = get_user_profiles_batch(unique_ids)
+        except Exception as e:
+            # Fall back to per-user reads below
+            print(f"   ⚠️  Batch profile fetch failed: {e}")
+    
+    def fetch(user_id):
+        try:
+            return get_user_evidence_data(
+                user_id, history_limit, recent_hours, profile=profiles.get(user_id)
+            )
+        except Exception as e:
+            # Left out of the map: gather_evidence fetches (or fails) per row
+            print(f"   ⚠️  Prefetch failed for {user_id}: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=PREFETCH_MAX_CONCURRENCY) as pool:
+        return {
+            user_id: data for user_id, data in zip(unique_ids, pool.map(fetch, unique_ids))
+            if data is not None
+        }
+
+
 def get_user_profile(user_id):
     """
-    Get aggregated user profile from transaction history
-    OPTIMIZED: Uses query with GSI
+    Get aggregated user profile
+    OPTIMIZED: Single GetItem on the materialized profile table, falling back
+    to aggregating the full history via the GSI
     """
     
     print(f"   📊 Fetching profile for: {user_id}")
     
-    table = get_dynamodb_table()
+    if USER_CACHE_ENABLED:
+        cached = _profile_cache.get(user_id)
+        if cached is not None:
+            print(f"   ⚡ Profile served from cache")
+            return cached
     
     try:
-        # Use GSI query instead of scan - MUCH FASTER!
-        response = table.query(
-            IndexName='UserIdIndex',
-            KeyConditionExpression='User_ID = :uid',
-            ExpressionAttributeValues={':uid': user_id}
-        )
+        if USE_MATERIALIZED_PROFILES:
+            profile = get_materialized_profile(user_id)
+            print(f"   ✅ Profile loaded: {profile['total_transactions']} transactions")
+        else:
+            # Use GSI query instead of scan - MUCH FASTER!
+            transactions = query_all_user_transactions(user_id)
+            
+            if not transactions:
+                print(f"   ⚠️  No transactions found for {user_id}")
+                return empty_user_profile(user_id)
+            
+            profile = build_user_profile(user_id, transactions)
+            print(f"   ✅ Profile loaded: {len(transactions)} transactions")
         
-        transactions = response.get('Items', [])
+        if USER_CACHE_ENABLED:
+            _profile_cache.set(user_id, profile)
+        return profile
         
-        # Handle pagination (still needed but much faster)
-        while 'LastEvaluatedKey' in response:
-            response = table.query(
-                IndexName='UserIdIndex',
-                KeyConditionExpression='User_ID = :uid',
-                ExpressionAttributeValues={':uid': user_id},
-                ExclusiveStartKey=response['LastEvaluatedKey']
-            )
-            transactions.extend(response.get('Items', []))
+    except Exception as e:
+        print(f"   ❌ Error fetching profile: {e}")
+        import traceback
+        traceback.print_exc()
+        return empty_user_profile(user_id)
+
+
+def get_velocity_counts(user_id, history, history_limit):
+    """
+    Sliding-window counts for a user, seeding the counters if missing
+    
+    The counters are dropped whenever the history is fetched fresh, so they
+    are re-seeded from the same history window that is being served. That
+    window seeds them unless it is truncated inside the longest velocity
+    window; then that window is fetched on its own.
+    
+    Returns:
+        dict: window name -> {'count', 'amount'}
+    """
+    if load_user_velocity(user_id) is None:
+        longest = max(span for span, _ in VELOCITY_WINDOWS.values())
+        cutoff = (datetime.now() - timedelta(seconds=longest)).isoformat()
+        if len(history) >= history_limit and history[-1].get('Timestamp', '') >= cutoff:
+            history = query_user_records(user_id, 'velocity', newest_first=True, cutoff=cutoff)
+        seed_user_velocity(user_id, history)
+    return get_user_velocity(user_id)
+
+
+def get_user_evidence_data(user_id, history_limit=100, recent_hours=24, profile=None):
+    """
+    Profile, recent history and recent count for the evidence collector
+    
+    With materialized profiles: one GetItem for the profile plus one query for
+    the newest history window (the 24h count is derived from that window).
+    Otherwise ONE full-history fetch serves all three. Warm user caches skip
+    DynamoDB entirely.
+    
+    Args:
+        user_id (str): User identifier
+        history_limit (int): Size of the newest-first history window
+        recent_hours (int): Window for the recent transaction count
+        profile (dict): Already-fetched materialized profile (skips the GetItem)
+        
+    Returns:
+        tuple: (profile dict, newest-first history list, recent count)
+    """
+    
+    # Timestamps are ISO strings, so string comparison matches the key condition
+    cutoff_time = (datetime.now() - timedelta(hours=recent_hours)).isoformat()
+    
+    if USE_MATERIALIZED_PROFILES:
+        # Both calls are served from the user caches when warm
+        if profile is None:
+            profile = get_user_profile(user_id)
+        history = get_user_transaction_history(user_id, days=None, limit=history_limit)
+    else:
+        history = get_cached_history(user_id, history_limit)
+        profile = _profile_cache.get(user_id) if history is not None else None
+    
+    if profile is not None and history is not None:
+        velocity = (get_velocity_counts(user_id, history, history_limit) or {}).get(f'{recent_hours}h')
+        if velocity is not None:
+            return profile, history, velocity['count']
+        
+        recent_count = sum(1 for t in history if t.get('Timestamp', '') >= cutoff_time)
+        
+        # Window is entirely inside the recent period: count may be truncated
+        if len(history) >= history_limit and recent_count == len(history):
+            recent_count = get_recent_transactions_count(user_id, hours=recent_hours)
+        
+        return profile, history, recent_count
+    
+    print(f"   📊 Fetching history for: {user_id}")
+    
+    try:
+        transactions = query_all_user_transactions(
+            user_id, newest_first=True, access_pattern='history'
+        )
+        discard_user_velocity(user_id)
         
         if not transactions:
             print(f"   ⚠️  No transactions found for {user_id}")
-            return {
-                'user_id': user_id,
-                'total_transactions': 0,
-                'avg_transaction_amount': 0,
-                'known_devices': [],
-                'known_locations': [],
-                'known_merchants': [],
-                'fraud_history': 0
-            }
-        
-        # Calculate statistics
-        amounts = [float(t.get('Transaction_Amount', 0)) for t in transactions]
-        devices = list(set([t.get('Device_Type') for t in transactions if t.get('Device_Type')]))
-        locations = list(set([t.get('Location') for t in transactions if t.get('Location')]))
-        merchants = list(set([t.get('Merchant_Category') for t in transactions if t.get('Merchant_Category')]))
-        fraud_count = sum([1 for t in transactions if t.get('Fraud_Label', 0) == 1])
-        
-        profile = {
-            'user_id': user_id,
-            'total_transactions': len(transactions),
-            'avg_transaction_amount': sum(amounts) / len(amounts) if amounts else 0,
-            'min_transaction': min(amounts) if amounts else 0,
-            'max_transaction': max(amounts) if amounts else 0,
-            'known_devices': devices[:10],  # Limit to top 10
-            'known_locations': locations[:10],
-            'known_merchants': merchants[:10],
-            'fraud_history': fraud_count,
-            'account_balance': float(transactions[-1].get('Account_Balance', 0)) if transactions else 0
-        }
+            seed_user_velocity(user_id, [])
+            return empty_user_profile(user_id), [], 0
         
-        print(f"   ✅ Profile loaded: {len(transactions)} transactions")
-        return profile
+        profile = build_user_profile(user_id, transactions, latest=transactions[0])
+        history = transactions[:history_limit]
+        seed_user_velocity(user_id, transactions)
+        recent_count = sum(1 for t in transactions if t.get('Timestamp', '') >= cutoff_time)
+        
+        if USER_CACHE_ENABLED:
+            _profile_cache.set(user_id, profile)
+            _history_cache.set(user_id, (history_limit, history))
+        
+        print(f"   ✅ Loaded {len(transactions)} transactions in one history fetch")
+        return profile, history, recent_count
         
     except Exception as e:
-        print(f"   ❌ Error fetching profile: {e}")
+        print(f"   ❌ Error fetching history: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            'user_id': user_id,
-            'total_transactions': 0,
-            'avg_transaction_amount': 0,
-            'known_devices': [],
-            'known_locations': [],
-            'known_merchants': [],
-            'fraud_history': 0
-        }
+        return empty_user_profile(user_id), [], 0
 
 
 def get_user_transaction_history(user_id, days=None, limit=50):
     """
-    Get user's transaction history
-    OPTIMIZED: Uses query with GSI and proper limit
+    Get user's transaction history (newest first)
+    OPTIMIZED: Uses query with GSI, projection and proper limit
     """
     
     print(f"   📜 Retrieving up to {limit} transactions...")
     
-    table = get_dynamodb_table()
+    if not days:
+        cached = get_cached_history(user_id, limit)
+        if cached is not None:
+            print(f"   ⚡ {len(cached)} transactions served from cache")
+            return cached
     
     try:
-        if days:
-            # With date filter
-            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            response = table.query(
-                IndexName='UserIdIndex',
-                KeyConditionExpression='User_ID = :uid AND #ts >= :cutoff',
-                ExpressionAttributeNames={'#ts': 'Timestamp'},
-                ExpressionAttributeValues={
-                    ':uid': user_id,
-                    ':cutoff': cutoff_date
-                },
-                Limit=limit,
-                ScanIndexForward=False  # Sort descending (newest first)
-            )
-        else:
-            # No date filter - just get latest N transactions
-            response = table.query(
-                IndexName='UserIdIndex',
-                KeyConditionExpression='User_ID = :uid',
-                ExpressionAttributeValues={':uid': user_id},
-                Limit=limit,
-                ScanIndexForward=False  # Sort descending
-            )
+        # With date filter (None = just get latest N transactions)
+        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat() if days else None
         
-        transactions = response.get('Items', [])
-        
-        # Only paginate if we haven't hit the limit
-        while 'LastEvaluatedKey' in response and len(transactions) < limit:
-            remaining = limit - len(transactions)
-            
-            if days:
-                response = table.query(
-                    IndexName='UserIdIndex',
-                    KeyConditionExpression='User_ID = :uid AND #ts >= :cutoff',
-                    ExpressionAttributeNames={'#ts': 'Timestamp'},
-                    ExpressionAttributeValues={
-                        ':uid': user_id,
-                        ':cutoff': cutoff_date
-                    },
-                    ExclusiveStartKey=response['LastEvaluatedKey'],
-                    Limit=remaining,
-                    ScanIndexForward=False
-                )
-            else:
-                response = table.query(
-                    IndexName='UserIdIndex',
-                    KeyConditionExpression='User_ID = :uid',
-                    ExpressionAttributeValues={':uid': user_id},
-                    ExclusiveStartKey=response['LastEvaluatedKey'],
-                    Limit=remaining,
-                    ScanIndexForward=False
-                )
-            
-            transactions.extend(response.get('Items', []))
+        transactions = query_user_records(
+            user_id,
+            'history',
+            newest_first=True,
+            limit=limit,
+            cutoff=cutoff_date
+        )
         
         print(f"   ✅ Found {len(transactions)} transactions")
+        
+        if not days:
+            # Fresh history: re-seed the velocity counters from it
+            discard_user_velocity(user_id)
+            if USER_CACHE_ENABLED:
+                _history_cache.set(user_id, (limit, transactions))
         return transactions
         
     except Exception as e:
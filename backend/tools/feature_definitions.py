@@ -0,0 +1,106 @@
+"""
+Derived model features, defined once for training and serving
+
+dataset_generation.py applies these to whole DataFrames (pandas Series /
+NumPy arrays in, int64 / float64 arrays out); the backend scorer applies the
+same functions to single transactions (scalars in, Python scalars out).
+The definitions are the ones the model was trained with, so any change here
+needs the training data regenerated and the model retrained.
+
+Depends only on NumPy and pandas: dataset_generation.py loads this file
+directly (not through the tools package), so keep it free of backend
+imports.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Point-in-time user-history windows (seconds): a transaction at `as_of` sees
+# only the user's transactions in [as_of - window, as_of)
+DAILY_WINDOW = 24 * 3600.0
+WEEKLY_WINDOW = 7 * 24 * 3600.0
+
+# User-history feature values without (recent) history
+MEDIAN_ACCOUNT_BALANCE = 50000.0  # Default account balance
+MEDIAN_CARD_AGE = 730  # 2 years in days
+MEDIAN_DAILY_TRANSACTIONS = 5
+MEDIAN_AVG_TRANSACTION_7D = 200.0
+
+# is_unusual_hour: hours 2-6 inclusive
+UNUSUAL_HOUR_START = 2
+UNUSUAL_HOUR_END = 6
+
+# is_high_value: above this fraction of the user's largest transaction...
+HIGH_VALUE_USER_MAX_RATIO = 0.8
+# ...or, for users without history (no known max), above this amount
+HIGH_VALUE_THRESHOLD = 1000.0
+
+
+def _flags(condition):
+    """0/1 flags: a Python int for scalar input, an int64 array otherwise"""
+    flags = np.asarray(condition, dtype=np.int64)
+    return int(flags) if flags.ndim == 0 else flags
+
+
+def is_weekend(day_of_week):
+    """1 on Saturday / Sunday (day_of_week: 0=Monday)"""
+    return _flags(np.asarray(day_of_week) >= 5)
+
+
+def is_unusual_hour(hour_of_day):
+    """1 between UNUSUAL_HOUR_START and UNUSUAL_HOUR_END (inclusive)"""
+    hour_of_day = np.asarray(hour_of_day)
+    return _flags((hour_of_day >= UNUSUAL_HOUR_START) & (hour_of_day <= UNUSUAL_HOUR_END))
+
+
+def amount_deviation_ratio(amount, avg_amount_7d):
+    """Transaction amount over the 7-day average (a zero average counts as 1)"""
+    avg_amount_7d = np.asarray(avg_amount_7d, dtype=np.float64)
+    ratio = np.asarray(amount, dtype=np.float64) / np.where(avg_amount_7d == 0, 1.0, avg_amount_7d)
+    return float(ratio) if ratio.ndim == 0 else ratio
+
+
+def is_high_value(amount, user_max_amount):
+    """
+    1 above HIGH_VALUE_USER_MAX_RATIO of the user's largest transaction
+
+    A user max of 0 (no history) falls back to HIGH_VALUE_THRESHOLD.
+    """
+    amount = np.asarray(amount, dtype=np.float64)
+    user_max_amount = np.asarray(user_max_amount, dtype=np.float64)
+    return _flags(np.where(
+        user_max_amount > 0,
+        amount > user_max_amount * HIGH_VALUE_USER_MAX_RATIO,
+        amount > HIGH_VALUE_THRESHOLD
+    ))
+
+
+def is_new_device(device, known_devices):
+    """
+    1 if the device is not one the user is known to have used
+
+    Args:
+        device: Device_Type (scalar), or a pd.MultiIndex of
+            (User_ID, Device_Type) per transaction
+        known_devices: The user's devices (set; empty = no history, never
+            new), or a pd.MultiIndex of every known (User_ID, Device_Type)
+    """
+    if isinstance(device, pd.MultiIndex):
+        return _flags(~device.isin(known_devices))
+    return _flags(bool(known_devices) and device not in known_devices)
+
+
+def is_new_device_as_of(device_first_used, user_first_seen, as_of):
+    """
+    is_new_device with the user's earlier transactions as the known set
+    
+    Vectorized over transactions: the device is known if the user first used
+    it before `as_of`; without earlier transactions nothing is known (never new).
+    
+    Args:
+        device_first_used: Time of the user's first transaction on the device
+        user_first_seen: Time of the user's first transaction
+        as_of: Transaction time
+    """
+    as_of = np.asarray(as_of)
+    return _flags((np.asarray(user_first_seen) < as_of) & ~(np.asarray(device_first_used) < as_of))
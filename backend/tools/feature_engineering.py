@@ -1,12 +1,15 @@
 from datetime import datetime
 import numpy as np
-from config import (
-    HIGH_VALUE_THRESHOLD, 
-    UNUSUAL_HOURS,
+from tools.feature_definitions import (
     MEDIAN_ACCOUNT_BALANCE,
     MEDIAN_CARD_AGE,
     MEDIAN_DAILY_TRANSACTIONS,
-    MEDIAN_AVG_TRANSACTION_7D
+    MEDIAN_AVG_TRANSACTION_7D,
+    amount_deviation_ratio,
+    is_high_value,
+    is_new_device,
+    is_unusual_hour,
+    is_weekend
 )
 
 
@@ -33,8 +36,8 @@ def generate_time_features(timestamp=None):
     return {
         'hour_of_day': dt.hour,
         'day_of_week': dt.weekday(),  # 0=Monday, 6=Sunday
-        'Is_Weekend': 1 if dt.weekday() >= 5 else 0,
-        'is_unusual_hour': 1 if dt.hour in UNUSUAL_HOURS else 0
+        'Is_Weekend': is_weekend(dt.weekday()),
+        'is_unusual_hour': is_unusual_hour(dt.hour)
     }
 
 
@@ -88,18 +91,14 @@ def calculate_risk_score(transaction_data, time_features):
     return min(risk_score, 1.0)  # Cap at 1.0
 
 
-def calculate_amount_deviation(amount, avg_amount_7d):
-    """
-    Calculate how much this transaction deviates from average
-    """
-    if avg_amount_7d == 0:
-        return 0.0
-    return abs(amount - avg_amount_7d) / avg_amount_7d
-
-
-def generate_all_features(transaction_data):
+def generate_all_features(transaction_data, user_features=None):
     """
     Generate ALL features from Lambda input
+    
+    Args:
+        transaction_data (dict): Raw transaction data from Lambda
+        user_features (dict): Point-in-time user-history features
+            (feature_store.get_user_features), or None for the defaults
     """
     
     # Step 1: Get time features
@@ -109,14 +108,14 @@ def generate_all_features(transaction_data):
     # Step 2: Map Lambda names to model names (capitalize first letter)
     amount = transaction_data.get('transaction_amount', 0)
     
-    # Step 3: Generate user history features (defaults for now)
+    # Step 3: User history features (defaults; replaced by user_features below)
     avg_amount_7d = MEDIAN_AVG_TRANSACTION_7D
     daily_txn_count = MEDIAN_DAILY_TRANSACTIONS
     
     # Step 4: Calculate derived features
     # Calculate risk_score for internal use, but DON'T add to features
     # risk_score = calculate_risk_score(transaction_data, time_features)
-    amount_deviation = calculate_amount_deviation(amount, avg_amount_7d)
+    amount_deviation = amount_deviation_ratio(amount, avg_amount_7d)
     
     # Step 5: Build complete feature dictionary (WITHOUT Risk_Score)
     features = {
@@ -144,7 +143,7 @@ def generate_all_features(transaction_data):
         
         # Calculated features (NO Risk_Score)
         'amount_deviation_ratio': amount_deviation,
-        'is_high_value': 1 if amount > HIGH_VALUE_THRESHOLD else 0,
+        'is_high_value': is_high_value(amount, 0),  # No user max yet: absolute threshold
         
         # Time features
         'hour_of_day': time_features['hour_of_day'],
@@ -153,47 +152,35 @@ def generate_all_features(transaction_data):
         'is_unusual_hour': time_features['is_unusual_hour']
     }
     
+    # Step 6: Point-in-time user history, when gathered for this transaction
+    if user_features is not None:
+        enrich_transaction_with_user_history(features, user_features)
+    
     return features
 
-def enrich_transaction_with_user_history(features, user_id, dynamodb_table=None):
+def enrich_transaction_with_user_history(features, user_features):
     """
-    OPTIONAL: Enrich features with real user history from DynamoDB
-    
-    Call this function if you have DynamoDB setup with user transaction history
+    Replace default user-history features with values from the feature store
     
     Args:
         features (dict): Feature dictionary from generate_all_features()
-        user_id (str): User identifier
-        dynamodb_table: Boto3 DynamoDB table resource
+        user_features (dict): Output of feature_store.get_user_features()
         
     Returns:
         dict: Updated features with real user history
     """
     
-    if dynamodb_table is None:
-        # No DynamoDB, return as-is
-        return features
+    amount = features['Transaction_Amount']
     
-    try:
-        # Query user's recent transactions
-        # This is a placeholder - implement based on your DynamoDB schema
-        
-        # Example query logic:
-        # response = dynamodb_table.query(
-        #     KeyConditionExpression='user_id = :uid',
-        #     ExpressionAttributeValues={':uid': user_id}
-        # )
-        
-        # Calculate from real history:
-        # features['Daily_Transaction_Count'] = calculate_daily_count(response)
-        # features['Avg_Transaction_Amount_7d'] = calculate_avg_7d(response)
-        # features['Failed_Transaction_Count_7d'] = count_failed(response)
-        # features['Previous_Fraudulent_Activity'] = check_fraud_history(response)
-        
-        pass
+    for col in ('Account_Balance', 'Previous_Fraudulent_Activity', 'Daily_Transaction_Count',
+                'Avg_Transaction_Amount_7d', 'Failed_Transaction_Count_7d', 'Card_Age'):
+        features[col] = user_features[col]
     
-    except Exception as e:
-        print(f"Error fetching user history: {e}")
-        # Keep default values
+    # Shared definitions (tools/feature_definitions.py), against the user's baseline
+    features['amount_deviation_ratio'] = amount_deviation_ratio(
+        amount, user_features['Avg_Transaction_Amount_7d']
+    )
+    features['is_high_value'] = is_high_value(amount, user_features['user_max_amount'])
+    features['is_new_device'] = is_new_device(features['Device_Type'], user_features['known_devices'])
     
-    return features
\ No newline at end of file
+    return features
@@ -0,0 +1,156 @@
+"""
+Online feature store for user-history model features
+
+The evidence collector already fetches each user's profile and newest
+history window from DynamoDB. That history is condensed once into a
+UserFeatureWindow (sorted timestamps plus prefix sums of amounts), so the
+scoring path can look up point-in-time 24h/7d aggregates in O(log n)
+without touching DynamoDB again.
+
+Window definitions match dataset_generation.py --point-in-time, which
+benchmarks/check_feature_store.py checks: only transactions strictly before
+the scored transaction count, over [as_of - window, as_of).
+"""
+
+from bisect import bisect_left
+from datetime import datetime
+from config import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS
+from tools.cache_tools import LRUCache
+from tools.feature_definitions import (
+    DAILY_WINDOW,
+    WEEKLY_WINDOW,
+    MEDIAN_ACCOUNT_BALANCE,
+    MEDIAN_CARD_AGE,
+    MEDIAN_AVG_TRANSACTION_7D
+)
+from tools.velocity_tools import parse_timestamp, get_user_velocity
+
+# Transactions this close to now are scored with the live velocity counters
+LIVE_TOLERANCE_SECONDS = 300
+
+_feature_store = LRUCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+
+class UserFeatureWindow:
+    """
+    Point-in-time aggregates over one user's history window
+
+    Args:
+        profile (dict): User profile (get_user_evidence_data)
+        history (list): Transaction items, any order
+    """
+
+    __slots__ = ('timestamps', 'amount_prefix', 'latest', 'latest_time',
+                 'avg_amount', 'max_amount', 'known_devices', 'fraud_history')
+
+    def __init__(self, profile, history):
+        rows = []
+        for txn in history:
+            try:
+                rows.append((parse_timestamp(txn.get('Timestamp')), txn))
+            except (TypeError, ValueError):
+                continue
+        rows.sort(key=lambda row: row[0])
+
+        self.timestamps = [ts for ts, _ in rows]
+        self.amount_prefix = [0.0]
+        for _, txn in rows:
+            self.amount_prefix.append(self.amount_prefix[-1] + float(txn.get('Transaction_Amount') or 0))
+
+        self.latest_time, self.latest = rows[-1] if rows else (None, None)
+        self.avg_amount = float(profile.get('avg_transaction_amount') or 0)
+        self.max_amount = float(profile.get('max_transaction') or 0)
+        self.known_devices = frozenset(profile.get('known_devices') or ())
+        self.fraud_history = int(profile.get('fraud_history') or 0)
+
+    def window(self, as_of, seconds):
+        """(count, amount sum) of transactions in [as_of - seconds, as_of)"""
+        end = bisect_left(self.timestamps, as_of)
+        start = bisect_left(self.timestamps, as_of - seconds, 0, end)
+        return end - start, self.amount_prefix[end] - self.amount_prefix[start]
+
+    def features(self, as_of):
+        """
+        Model features at epoch time `as_of`
+
+        Returns:
+            dict: FEATURE_COLUMNS entries derived from user history, plus the
+                profile baselines used for the amount/device features
+        """
+        daily_count, _ = self.window(as_of, DAILY_WINDOW)
+        weekly_count, weekly_sum = self.window(as_of, WEEKLY_WINDOW)
+
+        # Empty 7-day window: fall back to the all-time average, then the median
+        if weekly_count:
+            avg_amount_7d = weekly_sum / weekly_count
+        else:
+            avg_amount_7d = self.avg_amount or MEDIAN_AVG_TRANSACTION_7D
+
+        # Last-known snapshot attributes from the newest transaction
+        latest = self.latest or {}
+        balance = latest.get('Account_Balance')
+        card_age = latest.get('Card_Age')
+        failed_7d = latest.get('Failed_Transaction_Count_7d')
+        latest_recent = self.latest_time is not None and as_of - self.latest_time <= WEEKLY_WINDOW
+
+        if card_age is not None:
+            card_age = int(card_age) + max(int((as_of - self.latest_time) // 86400), 0)
+
+        return {
+            'Account_Balance': float(balance) if balance is not None else MEDIAN_ACCOUNT_BALANCE,
+            'Previous_Fraudulent_Activity': 1 if self.fraud_history > 0 else 0,
+            'Daily_Transaction_Count': daily_count,
+            'Avg_Transaction_Amount_7d': avg_amount_7d,
+            'Failed_Transaction_Count_7d': int(failed_7d) if failed_7d is not None and latest_recent else 0,
+            'Card_Age': card_age if card_age is not None else MEDIAN_CARD_AGE,
+            'user_max_amount': self.max_amount,
+            'known_devices': self.known_devices
+        }
+
+
+def store_user_features(user_id, profile, history):
+    """Condense a fetched profile + history into the store (called by the evidence collector)"""
+    if not user_id:
+        return None
+    window = UserFeatureWindow(profile, history)
+    _feature_store.set(user_id, window)
+    return window
+
+
+def get_user_features(user_id, timestamp=None):
+    """
+    History features for a user at the transaction time
+
+    Args:
+        user_id (str): User identifier
+        timestamp: Transaction time (ISO string / datetime); defaults to now
+
+    Returns:
+        dict: Feature values, or None if the user's history is not in the store
+    """
+    window = _feature_store.get(user_id) if user_id else None
+    if window is None:
+        return None
+
+    now = parse_timestamp(datetime.now())
+    try:
+        as_of = parse_timestamp(timestamp) if timestamp is not None else now
+    except (TypeError, ValueError):
+        as_of = now
+    features = window.features(as_of)
+
+    # Live transactions: the ingest-updated counters also cover transactions
+    # newer than (or beyond the limit of) the stored history window
+    if abs(now - as_of) <= LIVE_TOLERANCE_SECONDS:
+        velocity = get_user_velocity(user_id, as_of)
+        if velocity is not None:
+            features['Daily_Transaction_Count'] = velocity['24h']['count']
+            weekly = velocity['7d']
+            if weekly['count']:
+                features['Avg_Transaction_Amount_7d'] = weekly['amount'] / weekly['count']
+
+    return features
+
+
+def get_feature_store_stats():
+    return _feature_store.stats()
@@ -0,0 +1,110 @@
+import json
+
+
+class IncrementalJSONFieldParser:
+    """
+    Extract top-level scalar fields from a JSON object while it is streamed
+
+    Feed text chunks as they arrive; a field is reported as soon as its value
+    is complete, long before the closing brace. Text before the first '{'
+    (e.g. a ```json fence) is ignored and nested values are skipped.
+
+    Args:
+        fields (iterable): Top-level keys to extract
+    """
+
+    def __init__(self, fields):
+        self.fields = set(fields)
+        self.values = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+        self._scalar = None
+        self._expect = None  # At depth 1: 'key', 'colon', 'value' or 'comma'
+        self._key = None
+
+    @property
+    def complete(self):
+        """True once every requested field has been parsed"""
+        return len(self.values) == len(self.fields)
+
+    def _record(self, value):
+        if self._key in self.fields and self._key not in self.values:
+            self.values[self._key] = value
+            self._new[self._key] = value
+        self._expect = 'comma'
+
+    def _finish_scalar(self):
+        try:
+            self._record(json.loads(self._scalar))
+        except ValueError:
+            self._expect = 'comma'
+        self._scalar = None
+
+    def feed(self, text):
+        """
+        Consume the next chunk of the stream
+
+        Returns:
+            dict: Fields completed by this chunk
+        """
+        self._new = {}
+
+        for ch in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._end_string()
+                    continue
+                if self._depth == 1:
+                    self._buffer.append(ch)
+                continue
+
+            if self._scalar is not None:
+                if ch in ',}' or ch.isspace():
+                    self._finish_scalar()
+                else:
+                    self._scalar += ch
+                    continue
+
+            if ch == '"':
+                self._in_string = True
+                self._buffer = []
+            elif ch in '{[':
+                if self._depth == 0 and ch == '[':
+                    continue
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect = 'key'
+                elif self._depth == 2 and self._expect == 'value':
+                    self._expect = 'comma'  # Nested value: skipped
+            elif ch in '}]':
+                if self._depth > 0:
+                    self._depth -= 1
+            elif self._depth == 1:
+                if ch == ':' and self._expect == 'colon':
+                    self._expect = 'value'
+                elif ch == ',':
+                    self._expect = 'key'
+                elif self._expect == 'value' and not ch.isspace():
+                    self._scalar = ch
+
+        return self._new
+
+    def _end_string(self):
+        raw = ''.join(self._buffer)
+        try:
+            value = json.loads(f'"{raw}"')
+        except ValueError:
+            value = raw
+        if self._expect == 'key':
+            self._key = value
+            self._expect = 'colon'
+        elif self._expect == 'value':
+            self._record(value)
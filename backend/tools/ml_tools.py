@@ -2,15 +2,79 @@ import pandas as pd
 import numpy as np
 from tools.s3_tools import get_xgboost_model, get_label_encoder
 from tools.feature_engineering import generate_all_features
-from config import FEATURE_COLUMNS, CATEGORICAL_COLUMNS
+from config import (
+    FEATURE_COLUMNS,
+    CATEGORICAL_COLUMNS,
+    UNKNOWN_CATEGORY_CODE,
+    DEBUG_DATAFRAME_FEATURES
+)
 
+# Categorical lookup tables compiled from the label encoders (built once)
+_encoding_tables = None
 
-def prepare_features(transaction_data):
+# Column position of each model feature in the NumPy fast path
+FEATURE_INDEX = {col: i for i, col in enumerate(FEATURE_COLUMNS)}
+CATEGORICAL_SET = frozenset(CATEGORICAL_COLUMNS)
+
+
+def compile_encoding_tables(encoders):
+    """
+    Compile fitted LabelEncoders into plain dict lookup tables
+    
+    Args:
+        encoders: Dict of LabelEncoders keyed by column, or a single LabelEncoder
+        
+    Returns:
+        dict: {column: {category: code}}; columns without an encoder are omitted
+    """
+    is_dict = isinstance(encoders, dict)
+    tables = {}
+    
+    for col in CATEGORICAL_COLUMNS:
+        encoder = encoders.get(col) if is_dict else encoders
+        if encoder is None:
+            print(f"Warning: No encoder for {col}, using {UNKNOWN_CATEGORY_CODE}")
+            continue
+        tables[col] = {
+            category: int(code)
+            for code, category in enumerate(encoder.classes_.tolist())
+        }
+    
+    return tables
+
+
+def get_encoding_tables():
+    """
+    Lazy compile categorical lookup tables from the label encoders (once)
+    """
+    global _encoding_tables
+    
+    if _encoding_tables is None:
+        _encoding_tables = compile_encoding_tables(get_label_encoder())
+        print(f"Categorical lookup tables compiled for {len(_encoding_tables)} columns")
+    
+    return _encoding_tables
+
+
+def encode_category(col, value, tables):
+    """O(1) categorical encoding with explicit unknown-category code"""
+    table = tables.get(col)
+    if table is None:
+        return UNKNOWN_CATEGORY_CODE
+    code = table.get(value)
+    if code is None:
+        print(f"Warning: Unknown '{value}' in {col}, using {UNKNOWN_CATEGORY_CODE}")
+        return UNKNOWN_CATEGORY_CODE
+    return code
+
+
+def prepare_features(transaction_data, user_features=None):
     """
     Prepare transaction data for XGBoost model
     
     Args:
         transaction_data (dict): Raw transaction data from Lambda
+        user_features (dict): Point-in-time history features (None = defaults)
         
     Returns:
         pd.DataFrame: Prepared features in correct format
@@ -18,7 +82,7 @@ def prepare_features(transaction_data):
     
     # Step 1: Generate all 23 features
     print("Generating features from Lambda input...")
-    features = generate_all_features(transaction_data)
+    features = generate_all_features(transaction_data, user_features)
     
     # Step 2: Ensure features are in correct order
     ordered_features = {}
@@ -29,53 +93,189 @@ def prepare_features(transaction_data):
             print(f"Warning: Missing feature '{col}', using default 0")
             ordered_features[col] = 0
     
-    # Step 3: Create DataFrame
+    # Step 3: Encode categorical columns via precompiled lookup tables
+    tables = get_encoding_tables()
+    for col in CATEGORICAL_COLUMNS:
+        if col in ordered_features:
+            ordered_features[col] = encode_category(col, ordered_features[col], tables)
+    
+    # Step 4: Create DataFrame
     df = pd.DataFrame([ordered_features])
     
-    # Step 4: Encode categorical columns
-    encoders = get_label_encoder()  # This is a dict of encoders
+    print(f"✅ Features prepared: {df.shape}")
+    return df
+
+
+def prepare_features_batch(transactions, user_features=None):
+    """
+    Prepare a batch of transactions for XGBoost model in one DataFrame
     
-    # Check if it's a dict or single encoder
-    is_dict = isinstance(encoders, dict)
+    Args:
+        transactions (list): Raw transaction dicts from Lambda
+        user_features (list): Per-transaction history features (None = defaults)
+        
+    Returns:
+        pd.DataFrame: Prepared features, one row per transaction
+    """
+    
+    # Step 1: Generate features for every transaction
+    print(f"Generating features for {len(transactions)} transactions...")
+    user_features = user_features or [None] * len(transactions)
+    rows = [generate_all_features(txn, features) for txn, features in zip(transactions, user_features)]
+    
+    # Step 2: Build DataFrame in model column order (missing features -> 0)
+    df = pd.DataFrame(rows).reindex(columns=FEATURE_COLUMNS, fill_value=0)
+    
+    # Step 3: Encode categorical columns via precompiled lookup tables
+    tables = get_encoding_tables()
     
     for col in CATEGORICAL_COLUMNS:
-        if col in df.columns:
-            try:
-                original_value = df[col].iloc[0]
-                
-                if is_dict:
-                    # Multiple encoders (one per column)
-                    if col in encoders:
-                        encoder = encoders[col]
-                        if original_value in encoder.classes_:
-                            df[col] = encoder.transform([original_value])[0]
-                        else:
-                            print(f"Warning: Unknown '{original_value}' in {col}, using 0")
-                            df[col] = 0
-                    else:
-                        print(f"Warning: No encoder for {col}, using 0")
-                        df[col] = 0
-                else:
-                    # Single encoder (your old approach)
-                    if original_value in encoders.classes_:
-                        df[col] = encoders.transform([original_value])[0]
-                    else:
-                        print(f"Warning: Unknown '{original_value}' in {col}, using 0")
-                        df[col] = 0
-                    
-            except Exception as e:
-                print(f"Error encoding {col}: {e}")
-                df[col] = 0
+        if col not in df.columns:
+            continue
+        table = tables.get(col)
+        if table is None:
+            df[col] = UNKNOWN_CATEGORY_CODE
+            continue
+        
+        encoded = df[col].map(table)
+        unknown = encoded.isna()
+        if unknown.any():
+            print(f"Warning: Unknown {sorted(set(map(str, df.loc[unknown, col])))} in {col}, using {UNKNOWN_CATEGORY_CODE}")
+        df[col] = encoded.fillna(UNKNOWN_CATEGORY_CODE).astype(np.int64)
     
-    print(f"✅ Features prepared: {df.shape}")
+    print(f"✅ Batch features prepared: {df.shape}")
     return df
 
-def predict_fraud(transaction_data):
+
+def prepare_feature_vector(transaction_data, out=None, user_features=None):
+    """
+    Fast path: write features straight into a float32 NumPy row
+    
+    Skips pandas entirely; column order follows config.FEATURE_COLUMNS.
+    
+    Args:
+        transaction_data (dict): Raw transaction data from Lambda
+        out (np.ndarray): Optional preallocated float32 row to fill
+        user_features (dict): Point-in-time history features (None = defaults)
+        
+    Returns:
+        np.ndarray: Feature row of shape (1, n_features) (or `out` when given)
+    """
+    features = generate_all_features(transaction_data, user_features)
+    tables = get_encoding_tables()
+    
+    row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32) if out is None else out
+    flat = row.reshape(-1)
+    
+    for i, col in enumerate(FEATURE_COLUMNS):
+        value = features.get(col, 0)
+        if col in CATEGORICAL_SET:
+            value = encode_category(col, value, tables)
+        flat[i] = value
+    
+    return row
+
+
+def prepare_feature_matrix(transactions, user_features=None):
+    """
+    Fast path: featurize a batch into one preallocated float32 matrix
+    
+    Args:
+        transactions (list): Raw transaction dicts from Lambda
+        user_features (list): Per-transaction history features (None = defaults)
+        
+    Returns:
+        np.ndarray: Feature matrix of shape (n_transactions, n_features)
+    """
+    matrix = np.empty((len(transactions), len(FEATURE_COLUMNS)), dtype=np.float32)
+    user_features = user_features or [None] * len(transactions)
+    for i, (txn, features) in enumerate(zip(transactions, user_features)):
+        prepare_feature_vector(txn, out=matrix[i], user_features=features)
+    return matrix
+
+
+def get_risk_level(fraud_score):
+    """Map a 0-100 fraud score to a risk level"""
+    if fraud_score < 30:
+        return "LOW"
+    elif fraud_score < 70:
+        return "MEDIUM"
+    return "HIGH"
+
+def build_feature_summary(transaction_data, unusual_hour, hour, is_high_value):
+    """Feature values surfaced alongside a prediction for transparency"""
+    return {
+        'amount': transaction_data.get('transaction_amount'),
+        'type': transaction_data.get('transaction_type'),
+        'merchant': transaction_data.get('merchant_category'),
+        'time_based_risk': int(unusual_hour),
+        'hour': int(hour),
+        'is_high_value': int(is_high_value)
+    }
+
+
+def run_inference(model, features, transactions):
+    """
+    Single-pass inference: one booster invocation for all prepared rows
+    
+    Probability, confidence, risk level and feature summary are all derived
+    from the same model output. NumPy features go straight to the booster via
+    inplace_predict; DataFrames (debug path) go through predict_proba.
+    
+    Args:
+        model: Loaded XGBoost classifier
+        features (np.ndarray | pd.DataFrame): Prepared features, one row per transaction
+        transactions (list): Transaction dicts matching the feature rows
+        
+    Returns:
+        list: Fraud prediction results, in input order
+    """
+    if isinstance(features, pd.DataFrame):
+        probabilities = model.predict_proba(features)
+        fraud_probs = probabilities[:, 1]  # Probability of fraud (class 1)
+        confidences = probabilities.max(axis=1)
+        
+        def column(name):
+            if name in features.columns:
+                return features[name].to_numpy()
+            return np.zeros(len(features), dtype=np.int64)
+    else:
+        fraud_probs = model.get_booster().inplace_predict(features)
+        confidences = np.maximum(fraud_probs, 1 - fraud_probs)
+        
+        def column(name):
+            return features[:, FEATURE_INDEX[name]]
+    
+    unusual_hours = column('is_unusual_hour')
+    hours = column('hour_of_day')
+    high_values = column('is_high_value')
+    
+    results = []
+    for i, transaction_data in enumerate(transactions):
+        fraud_prob = fraud_probs[i]
+        fraud_score = int(fraud_prob * 100)
+        
+        results.append({
+            "fraud_probability": round(fraud_prob, 4),
+            "fraud_score": fraud_score,
+            "risk_level": get_risk_level(fraud_score),
+            "model_confidence": round(confidences[i], 4),
+            "feature_summary": build_feature_summary(
+                transaction_data, unusual_hours[i], hours[i], high_values[i]
+            )
+        })
+    
+    return results
+
+
+def predict_fraud(transaction_data, user_features=None):
     """
     Predict fraud probability using XGBoost model
     
     Args:
         transaction_data (dict): Transaction details from Lambda
+        user_features (dict): Point-in-time history features from the
+            evidence collector (None = history defaults)
         
     Returns:
         dict: Fraud prediction results
@@ -84,46 +284,51 @@ def predict_fraud(transaction_data):
         # Load model
         model = get_xgboost_model()
         
-        # Prepare features
-        features = prepare_features(transaction_data)
+        # Prepare features (NumPy fast path; DataFrame only when debugging)
+        if DEBUG_DATAFRAME_FEATURES:
+            features = prepare_features(transaction_data, user_features)
+        else:
+            features = prepare_feature_vector(transaction_data, user_features=user_features)
         
-        # Get prediction probability
-        fraud_prob = model.predict_proba(features)[0][1]  # Probability of fraud (class 1)
+        # Single booster invocation for probability, confidence and risk level
+        return run_inference(model, features, [transaction_data])[0]
         
-        # Calculate fraud score (0-100)
-        fraud_score = int(fraud_prob * 100)
+    except Exception as e:
+        print(f"Error in fraud prediction: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+
+def predict_fraud_batch(transactions, user_features=None):
+    """
+    Predict fraud probability for many transactions with one model call
+    
+    Args:
+        transactions (list): Transaction dicts from Lambda
+        user_features (list): Per-transaction history features (None = defaults)
         
-        # Determine risk level
-        if fraud_score < 30:
-            risk_level = "LOW"
-        elif fraud_score < 70:
-            risk_level = "MEDIUM"
+    Returns:
+        list: Fraud prediction results (same shape as predict_fraud), in input order
+    """
+    if not transactions:
+        return []
+    
+    try:
+        # Load model
+        model = get_xgboost_model()
+        
+        # Prepare features for the whole batch
+        if DEBUG_DATAFRAME_FEATURES:
+            features = prepare_features_batch(transactions, user_features)
         else:
-            risk_level = "HIGH"
-        
-        # Get model confidence (max probability)
-        confidence = max(model.predict_proba(features)[0])
-        
-        # Get feature values for transparency (safely access features)
-        feature_summary = {
-            'amount': transaction_data.get('transaction_amount'),
-            'type': transaction_data.get('transaction_type'),
-            'merchant': transaction_data.get('merchant_category'),
-            'time_based_risk': int(features['is_unusual_hour'].iloc[0]) if 'is_unusual_hour' in features.columns else 0,
-            'hour': int(features['hour_of_day'].iloc[0]) if 'hour_of_day' in features.columns else 0,
-            'is_high_value': int(features['is_high_value'].iloc[0]) if 'is_high_value' in features.columns else 0
-        }
+            features = prepare_feature_matrix(transactions, user_features)
         
-        return {
-            "fraud_probability": round(fraud_prob, 4),
-            "fraud_score": fraud_score,
-            "risk_level": risk_level,
-            "model_confidence": round(confidence, 4),
-            "feature_summary": feature_summary
-        }
+        # Single vectorized prediction for every row
+        return run_inference(model, features, transactions)
         
     except Exception as e:
-        print(f"Error in fraud prediction: {e}")
+        print(f"Error in batch fraud prediction: {e}")
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
@@ -1,11 +1,266 @@
 import boto3
+import hashlib
 import json
-from config import AWS_REGION, NOVA_INFERENCE_ARN
+import threading
+import time
+from botocore.config import Config
+from tools.cache_tools import LRUCache, DiskCache
+from tools.json_stream_tools import IncrementalJSONFieldParser
+from config import (
+    AWS_REGION,
+    NOVA_INFERENCE_ARN,
+    BEDROCK_MAX_POOL_CONNECTIONS,
+    BEDROCK_CONNECT_TIMEOUT,
+    BEDROCK_READ_TIMEOUT,
+    BEDROCK_MAX_RETRIES,
+    BEDROCK_TCP_KEEPALIVE,
+    NOVA_CACHE_ENABLED,
+    NOVA_CACHE_MAX_ENTRIES,
+    NOVA_CACHE_TTL_SECONDS,
+    NOVA_CACHE_DISK_PATH,
+    NOVA_CACHE_DISK_MAX_ENTRIES,
+    NOVA_STREAMING_ENABLED
+)
+
+# Cached Bedrock client (boto3 clients are thread-safe, so one is shared)
+_bedrock_client = None
+_bedrock_client_lock = threading.Lock()
+_bedrock_client_stats = {
+    'construction_seconds': 0.0,
+    'reuses': 0
+}
+
+
+def get_bedrock_client():
+    """
+    Get the process-wide Bedrock runtime client (created once)
+    
+    The client keeps a keep-alive HTTP connection pool sized by
+    BEDROCK_MAX_POOL_CONNECTIONS, so concurrent agents share connections
+    instead of loading service models and opening sockets per call.
+    """
+    global _bedrock_client
+    
+    if _bedrock_client is None:
+        with _bedrock_client_lock:
+            if _bedrock_client is None:
+                start = time.perf_counter()
+                _bedrock_client = boto3.client(
+                    "bedrock-runtime",
+                    region_name=AWS_REGION,
+                    config=Config(
+                        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+                        read_timeout=BEDROCK_READ_TIMEOUT,
+                        retries={'max_attempts': BEDROCK_MAX_RETRIES, 'mode': 'adaptive'},
+                        tcp_keepalive=BEDROCK_TCP_KEEPALIVE
+                    )
+                )
+                _bedrock_client_stats['construction_seconds'] = time.perf_counter() - start
+                print(f"Bedrock client created in {_bedrock_client_stats['construction_seconds']:.3f}s")
+                return _bedrock_client
+    
+    with _bedrock_client_lock:
+        _bedrock_client_stats['reuses'] += 1
+    return _bedrock_client
+
+
+def get_bedrock_client_stats():
+    """
+    Client reuse metrics
+    
+    Returns:
+        dict: Construction time, reuse count and estimated construction time saved
+    """
+    construction = _bedrock_client_stats['construction_seconds']
+    reuses = _bedrock_client_stats['reuses']
+    return {
+        'client_created': _bedrock_client is not None,
+        'construction_seconds': round(construction, 4),
+        'reuses': reuses,
+        'construction_seconds_saved': round(construction * reuses, 4),
+        'max_pool_connections': BEDROCK_MAX_POOL_CONNECTIONS
+    }
+
+
+# Nova response cache: in-memory LRU tier + optional SQLite tier
+_nova_memory_cache = LRUCache(NOVA_CACHE_MAX_ENTRIES, NOVA_CACHE_TTL_SECONDS)
+_nova_disk_cache = None
+_nova_disk_cache_lock = threading.Lock()
+
+
+def get_nova_disk_cache():
+    """Get the on-disk Nova cache tier (None unless NOVA_CACHE_DISK_PATH is set)"""
+    global _nova_disk_cache
+    if NOVA_CACHE_DISK_PATH and _nova_disk_cache is None:
+        with _nova_disk_cache_lock:
+            if _nova_disk_cache is None:
+                _nova_disk_cache = DiskCache(
+                    NOVA_CACHE_DISK_PATH,
+                    NOVA_CACHE_DISK_MAX_ENTRIES,
+                    NOVA_CACHE_TTL_SECONDS
+                )
+    return _nova_disk_cache
+
+
+def make_nova_cache_key(prompt, max_tokens, temperature, model_id=NOVA_INFERENCE_ARN):
+    """Content-addressed cache key for a Nova request"""
+    digest = hashlib.sha256()
+    digest.update(f"{model_id}|{max_tokens}|{temperature}|".encode("utf-8"))
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_nova_cache_stats():
+    """Hit/miss counters for both cache tiers"""
+    disk_cache = get_nova_disk_cache()
+    return {
+        'enabled': NOVA_CACHE_ENABLED,
+        'memory': _nova_memory_cache.stats(),
+        'disk': disk_cache.stats() if disk_cache else None
+    }
 
 
 def call_nova(prompt, max_tokens=1000, temperature=0.3):
     """
-    Call Amazon Nova Pro via Bedrock
+    Call Amazon Nova Pro via Bedrock, serving repeated prompts from cache
+    
+    Args:
+        prompt (str): Text prompt for Nova
+        max_tokens (int): Maximum tokens in response
+        temperature (float): Sampling temperature
+        
+    Returns:
+        str: Nova's text response
+    """
+    if not NOVA_CACHE_ENABLED:
+        return invoke_nova(prompt, max_tokens, temperature)
+    
+    key = make_nova_cache_key(prompt, max_tokens, temperature)
+    
+    cached = _nova_memory_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    disk_cache = get_nova_disk_cache()
+    if disk_cache is not None:
+        cached = disk_cache.get(key)
+        if cached is not None:
+            _nova_memory_cache.set(key, cached)
+            return cached
+    
+    response = invoke_nova(prompt, max_tokens, temperature)
+    
+    _nova_memory_cache.set(key, response)
+    if disk_cache is not None:
+        disk_cache.set(key, response)
+    
+    return response
+
+
+def call_nova_streaming(prompt, fields, on_fields, max_tokens=1000, temperature=0.3):
+    """
+    call_nova, reporting selected top-level JSON fields as soon as generated
+    
+    The response is streamed and parsed incrementally; `on_fields` is called
+    once, with every field in `fields`, the moment the last of them is
+    complete (immediately on a cache hit). It is not called if the response
+    lacks any of them.
+    
+    Args:
+        prompt (str): Text prompt for Nova (expects a JSON object back)
+        fields (iterable): Top-level keys to surface early
+        on_fields (callable): Receives {field: value}
+        max_tokens (int): Maximum tokens in response
+        temperature (float): Sampling temperature
+        
+    Returns:
+        str: Nova's full text response
+    """
+    parser = IncrementalJSONFieldParser(fields)
+    
+    def on_text(text):
+        if not parser.complete and parser.feed(text) and parser.complete:
+            on_fields(dict(parser.values))
+    
+    key = make_nova_cache_key(prompt, max_tokens, temperature)
+    if NOVA_CACHE_ENABLED:
+        cached = _nova_memory_cache.get(key)
+        disk_cache = get_nova_disk_cache()
+        if cached is None and disk_cache is not None:
+            cached = disk_cache.get(key)
+            if cached is not None:
+                _nova_memory_cache.set(key, cached)
+        if cached is not None:
+            on_text(cached)
+            return cached
+    
+    if NOVA_STREAMING_ENABLED:
+        response = invoke_nova_stream(prompt, max_tokens, temperature, on_text)
+    else:
+        response = invoke_nova(prompt, max_tokens, temperature)
+        on_text(response)
+    
+    if NOVA_CACHE_ENABLED:
+        _nova_memory_cache.set(key, response)
+        disk_cache = get_nova_disk_cache()
+        if disk_cache is not None:
+            disk_cache.set(key, response)
+    
+    return response
+
+
+def invoke_nova_stream(prompt, max_tokens=1000, temperature=0.3, on_text=None):
+    """
+    Call Amazon Nova Pro via Bedrock with response streaming (uncached)
+    
+    Args:
+        prompt (str): Text prompt for Nova
+        max_tokens (int): Maximum tokens in response
+        temperature (float): Sampling temperature
+        on_text (callable): Receives each text delta as it arrives
+        
+    Returns:
+        str: Nova's full text response
+    """
+    bedrock_runtime = get_bedrock_client()
+    
+    try:
+        response = bedrock_runtime.invoke_model_with_response_stream(
+            modelId=NOVA_INFERENCE_ARN,
+            body=json.dumps({
+                "messages": [{"role": "user", "content": [{"text": prompt}]}],
+                "inferenceConfig": {
+                    "maxTokens": max_tokens,
+                    "temperature": temperature
+                }
+            }),
+            contentType="application/json",
+            accept="application/json"
+        )
+        
+        parts = []
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if chunk is None:
+                continue
+            delta = json.loads(chunk["bytes"]).get("contentBlockDelta", {}).get("delta", {})
+            text = delta.get("text")
+            if text:
+                parts.append(text)
+                if on_text is not None:
+                    on_text(text)
+        
+        return "".join(parts)
+        
+    except Exception as e:
+        print(f"Nova streaming API Error: {e}")
+        raise
+
+
+def invoke_nova(prompt, max_tokens=1000, temperature=0.3):
+    """
+    Call Amazon Nova Pro via Bedrock (uncached)
     
     Args:
         prompt (str): Text prompt for Nova
@@ -15,7 +270,7 @@ def call_nova(prompt, max_tokens=1000, temperature=0.3):
     Returns:
         str: Nova's text response
     """
-    bedrock_runtime = boto3.client("bedrock-runtime", region_name=AWS_REGION)
+    bedrock_runtime = get_bedrock_client()
     
     messages = [
         {
@@ -46,4 +301,4 @@ def call_nova(prompt, max_tokens=1000, temperature=0.3):
         
     except Exception as e:
         print(f"Nova API Error: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,226 @@
+import json
+import math
+import threading
+from datetime import datetime, timezone
+from config import (
+    USER_CACHE_MAX_ENTRIES,
+    VELOCITY_WINDOWS,
+    VELOCITY_TTL_SECONDS,
+    VELOCITY_DISK_PATH
+)
+from tools.cache_tools import LRUCache, DiskCache
+
+_velocity_memory = LRUCache(USER_CACHE_MAX_ENTRIES, VELOCITY_TTL_SECONDS)
+_velocity_disk = None
+_velocity_disk_lock = threading.Lock()
+
+
+def parse_timestamp(value):
+    """ISO string / datetime -> epoch seconds (naive timestamps are read as UTC)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SlidingWindowCounter:
+    """
+    Count and amount sum over a sliding time window, in fixed-size buckets
+
+    Running totals are kept alongside a ring of buckets; moving forward in
+    time only subtracts the buckets that fell out of the window, so adds and
+    queries are amortized O(1). The window edge is accurate to one bucket.
+
+    Args:
+        span (float): Window length in seconds
+        bucket_seconds (float): Bucket width in seconds
+    """
+
+    __slots__ = ('bucket_seconds', 'size', 'head', 'counts', 'sums', 'count', 'total')
+
+    def __init__(self, span, bucket_seconds):
+        self.bucket_seconds = bucket_seconds
+        self.size = math.ceil(span / bucket_seconds)
+        self.head = None
+        self.counts = [0] * self.size
+        self.sums = [0.0] * self.size
+        self.count = 0
+        self.total = 0.0
+
+    def _advance(self, bucket):
+        """Move the newest bucket forward, expiring buckets that left the window"""
+        if self.head is None or bucket - self.head >= self.size:
+            self.counts = [0] * self.size
+            self.sums = [0.0] * self.size
+            self.count = 0
+            self.total = 0.0
+        else:
+            for expired in range(self.head + 1, bucket + 1):
+                slot = expired % self.size
+                self.count -= self.counts[slot]
+                self.total -= self.sums[slot]
+                self.counts[slot] = 0
+                self.sums[slot] = 0.0
+        self.head = bucket
+
+    def add(self, ts, amount):
+        bucket = int(ts // self.bucket_seconds)
+        if self.head is None or bucket > self.head:
+            self._advance(bucket)
+        elif bucket <= self.head - self.size:
+            return  # Older than the window
+
+        slot = bucket % self.size
+        self.counts[slot] += 1
+        self.sums[slot] += amount
+        self.count += 1
+        self.total += amount
+
+    def totals(self, now):
+        """(count, amount sum) for the window ending at epoch time `now`"""
+        bucket = int(now // self.bucket_seconds)
+        if self.head is not None and bucket > self.head:
+            self._advance(bucket)
+        return self.count, self.total
+
+    def to_dict(self):
+        return {'head': self.head, 'counts': self.counts, 'sums': self.sums}
+
+    def load(self, data):
+        if len(data['counts']) != self.size:
+            return  # Window config changed since the snapshot; start empty
+        self.head = data['head']
+        self.counts = list(data['counts'])
+        self.sums = list(data['sums'])
+        self.count = sum(self.counts)
+        self.total = sum(self.sums)
+
+
+class UserVelocity:
+    """One user's counters for every window in config.VELOCITY_WINDOWS"""
+
+    def __init__(self):
+        self.windows = {
+            name: SlidingWindowCounter(span, bucket_seconds)
+            for name, (span, bucket_seconds) in VELOCITY_WINDOWS.items()
+        }
+        self._lock = threading.Lock()
+
+    def add(self, ts, amount):
+        with self._lock:
+            for counter in self.windows.values():
+                counter.add(ts, amount)
+
+    def snapshot(self, now=None):
+        """
+        Returns:
+            dict: window name -> {'count', 'amount'}
+        """
+        now = parse_timestamp(datetime.now()) if now is None else now
+        with self._lock:
+            return {
+                name: dict(zip(('count', 'amount'), counter.totals(now)))
+                for name, counter in self.windows.items()
+            }
+
+    def to_json(self):
+        with self._lock:
+            return json.dumps({name: counter.to_dict() for name, counter in self.windows.items()})
+
+    @classmethod
+    def from_json(cls, payload):
+        velocity = cls()
+        for name, data in json.loads(payload).items():
+            if name in velocity.windows:
+                velocity.windows[name].load(data)
+        return velocity
+
+
+def get_velocity_disk_cache():
+    """SQLite snapshot store for the counters, or None if not configured"""
+    global _velocity_disk
+    if VELOCITY_DISK_PATH and _velocity_disk is None:
+        with _velocity_disk_lock:
+            if _velocity_disk is None:
+                _velocity_disk = DiskCache(VELOCITY_DISK_PATH, USER_CACHE_MAX_ENTRIES, VELOCITY_TTL_SECONDS)
+    return _velocity_disk
+
+
+def load_user_velocity(user_id):
+    """Counters from memory, then the disk snapshot (None if neither has them)"""
+    velocity = _velocity_memory.get(user_id)
+    if velocity is None:
+        disk = get_velocity_disk_cache()
+        payload = disk.get(user_id) if disk is not None else None
+        if payload is not None:
+            velocity = UserVelocity.from_json(payload)
+            _velocity_memory.set(user_id, velocity)
+    return velocity
+
+
+def save_user_velocity(user_id, velocity):
+    _velocity_memory.set(user_id, velocity)
+    disk = get_velocity_disk_cache()
+    if disk is not None:
+        disk.set(user_id, velocity.to_json())
+
+
+def seed_user_velocity(user_id, transactions):
+    """
+    Build a user's counters from fetched history (no-op if they already exist;
+    discard_user_velocity first to re-seed)
+
+    Args:
+        user_id (str): User identifier
+        transactions (list): Every transaction of the user within the longest
+            window (older items are ignored)
+
+    Returns:
+        UserVelocity: The user's counters
+    """
+    velocity = load_user_velocity(user_id)
+    if velocity is not None:
+        return velocity
+
+    velocity = UserVelocity()
+    for txn in transactions:
+        try:
+            velocity.add(parse_timestamp(txn.get('Timestamp')), float(txn.get('Transaction_Amount') or 0))
+        except (TypeError, ValueError):
+            continue
+    save_user_velocity(user_id, velocity)
+    return velocity
+
+
+def discard_user_velocity(user_id):
+    """
+    Drop a user's counters (memory and disk snapshot)
+
+    Called whenever the user's history is fetched fresh from DynamoDB, so the
+    next lookup re-seeds them from that history: the counters never lag the
+    history they are served next to.
+    """
+    _velocity_memory.invalidate(user_id)
+    disk = get_velocity_disk_cache()
+    if disk is not None:
+        disk.invalidate(user_id)
+
+
+def get_user_velocity(user_id, now=None):
+    """
+    Counts and amount sums per window for a user, O(1)
+
+    Returns:
+        dict: window name -> {'count', 'amount'}, or None if not seeded
+    """
+    velocity = load_user_velocity(user_id) if user_id else None
+    return velocity.snapshot(now) if velocity is not None else None
+
+
+def get_velocity_stats():
+    disk = get_velocity_disk_cache()
+    return {
+        'memory': _velocity_memory.stats(),
+        'disk': disk.stats() if disk is not None else None
+    }
@@ -0,0 +1,71 @@
+"""
+Regression check + timing benchmark for enhance_transactions
+
+Compares the vectorized feature enhancement with the original row-wise
+DataFrame.apply version (kept below) - the enhanced frames must match -
+then times both on the dataset resampled to larger sizes. The apply version
+is only timed up to LEGACY_MAX_ROWS.
+
+Run from dataset-and-models/:
+    python -m benchmarks.bench_enhance_transactions [rows ...]
+"""
+
+import sys
+import time
+import pandas as pd
+from benchmarks.bench_user_profiles import DATASET_PATH, resample
+from dataset_generation import enhance_transactions, load_transactions
+
+SIZES = [50_000, 1_000_000, 5_000_000]
+LEGACY_MAX_ROWS = 1_000_000
+
+
+def legacy_enhance_transactions(df):
+    """Original implementation: per-element and row-wise apply"""
+    df['hour_of_day'] = df['Timestamp'].dt.hour
+    df['day_of_week'] = df['Timestamp'].dt.dayofweek
+    df['is_unusual_hour'] = df['hour_of_day'].apply(lambda x: 1 if 2 <= x <= 6 else 0)
+    
+    df['amount_deviation_ratio'] = df['Transaction_Amount'] / df['Avg_Transaction_Amount_7d'].replace(0, 1)
+    
+    user_max_amounts = df.groupby('User_ID')['Transaction_Amount'].max().to_dict()
+    user_devices = df.groupby('User_ID')['Device_Type'].apply(list).to_dict()
+    
+    df['is_high_value'] = df.apply(lambda row: 1 if row['Transaction_Amount'] > user_max_amounts.get(row['User_ID'], 0) * 0.8 else 0, axis=1)
+    df['is_new_device'] = df.apply(lambda row: 0 if row['Device_Type'] in user_devices.get(row['User_ID'], []) else 1, axis=1)
+    return df
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df.copy())
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    df = load_transactions(DATASET_PATH)
+    print(f"🔎 enhance_transactions regression check ({len(df)} transactions)\n")
+    
+    expected, _ = timed(legacy_enhance_transactions, df)
+    actual, _ = timed(enhance_transactions, df)
+    try:
+        pd.testing.assert_frame_equal(actual, expected)
+        ok = True
+        print("enhanced transactions  ✅ match")
+    except AssertionError as e:
+        ok = False
+        print(f"enhanced transactions  ❌ MISMATCH\n{e}")
+    
+    print(f"\n{'rows':>12} {'row-wise apply':>15} {'vectorized':>11}")
+    for rows in sizes:
+        sample = df if rows == len(df) else resample(df, rows)
+        _, vectorized_seconds = timed(enhance_transactions, sample)
+        if rows <= LEGACY_MAX_ROWS:
+            legacy = f"{timed(legacy_enhance_transactions, sample)[1]:.2f}s"
+        else:
+            legacy = '-'
+        print(f"{rows:>12,} {legacy:>15} {vectorized_seconds:>10.2f}s")
+        del sample
+    
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,92 @@
+"""
+Storage benchmark for the enhanced transactions: CSV vs Parquet vs Arrow IPC
+
+Writes the enhanced dataset (resampled to each size) with
+EnhancedTransactionWriter, checks every format loads back the same training
+columns, and reports file size, full load time and the training script's
+pruned load time (feature columns + label only).
+
+Run from dataset-and-models/:
+    python -m benchmarks.bench_storage_formats [rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.bench_user_profiles import DATASET_PATH, resample
+from dataset_generation import (
+    CATEGORICAL_COLUMNS,
+    STORAGE_FORMATS,
+    EnhancedTransactionWriter,
+    collect_categories,
+    enhance_transactions,
+    load_transactions,
+    read_enhanced_transactions
+)
+
+SIZES = [50_000, 1_000_000]
+NON_FEATURE_COLUMNS = ['Transaction_ID', 'User_ID', 'Timestamp', 'Risk_Score']
+
+
+def timed_read(path, columns=None):
+    start = time.perf_counter()
+    df = read_enhanced_transactions(path, columns)
+    return df, time.perf_counter() - start
+
+
+def same_values(df, reference):
+    """Column-wise equality; CSV floats are rounded on write, so floats are compared with tolerance"""
+    for column in reference.columns:
+        left, right = df[column], reference[column]
+        if column in CATEGORICAL_COLUMNS:
+            if not (left.astype(str) == right.astype(str)).all():
+                return False
+        elif not np.allclose(left.astype(float), right.astype(float)):
+            return False
+    return True
+
+
+def benchmark(df, directory):
+    training_columns = [c for c in df.columns if c not in NON_FEATURE_COLUMNS]
+    categories = collect_categories(df)
+
+    ok = True
+    reference = None
+    print(f"\n{len(df):,} rows")
+    print(f"{'format':>10} {'size':>10} {'full load':>10} {'training load':>14}")
+    for storage_format, extension in STORAGE_FORMATS.items():
+        path = os.path.join(directory, f"transactions_enhanced{extension}")
+        with EnhancedTransactionWriter(path, categories) as writer:
+            writer.write(df)
+
+        _, full_seconds = timed_read(path)
+        training, training_seconds = timed_read(path, training_columns)
+        if reference is None:
+            reference = training
+        elif not same_values(training, reference):
+            ok = False
+            print(f"   ❌ {storage_format} training columns differ from csv")
+
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{storage_format:>10} {size_mb:>8.1f}MB {full_seconds:>9.3f}s {training_seconds:>13.3f}s")
+        os.remove(path)
+    return ok
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    source = load_transactions(DATASET_PATH)
+    print("🔎 Enhanced transaction storage formats")
+
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            sample = source.copy() if rows == len(source) else resample(source, rows)
+            ok = benchmark(enhance_transactions(sample), directory) and ok
+            del sample
+
+    print(f"\ntraining columns {'✅ match' if ok else '❌ MISMATCH'} across formats")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,104 @@
+"""
+Regression check + timing benchmark for generate_user_profiles
+
+1. Regression: the grouped implementation vs. the original per-user loop
+   (kept below) on the synthetic dataset; the profile frames must match.
+2. Timing: the grouped implementation on the dataset resampled to larger
+   sizes (users scaled with rows, ~7 transactions per user as in the
+   source data). The per-user loop is only timed at the smallest size -
+   it is O(users x rows).
+
+Run from dataset-and-models/:
+    python -m benchmarks.bench_user_profiles [rows ...]
+"""
+
+import sys
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+from dataset_generation import PROFILE_COLUMNS, generate_user_profiles, load_transactions
+
+DATASET_PATH = "synthetic_fraud_dataset.csv"
+SIZES = [50_000, 1_000_000, 10_000_000]
+
+
+def legacy_generate_user_profiles(transactions_df):
+    """Original implementation: filters the full DataFrame once per user"""
+    user_profiles = []
+    
+    for user_id in transactions_df['User_ID'].unique():
+        user_txns = transactions_df[transactions_df['User_ID'] == user_id]
+        
+        profile = {
+            'user_id': user_id,
+            'total_transactions': len(user_txns),
+            'avg_transaction_amount': user_txns['Transaction_Amount'].mean(),
+            'account_age_days': (user_txns['Timestamp'].max() - user_txns['Timestamp'].min()).days,
+            'transaction_frequency': len(user_txns) / max((user_txns['Timestamp'].max() - user_txns['Timestamp'].min()).days, 1),
+            'typical_locations': Counter(user_txns['Location']).most_common(3),
+            'home_location': user_txns['Location'].mode()[0] if not user_txns['Location'].mode().empty else None,
+            'known_devices': user_txns['Device_Type'].unique().tolist(),
+            'typical_merchants': Counter(user_txns['Merchant_Category']).most_common(3),
+            'fraud_history_count': user_txns['Previous_Fraudulent_Activity'].sum(),
+            'highest_transaction': user_txns['Transaction_Amount'].max(),
+            'typical_card_type': user_txns['Card_Type'].mode()[0] if not user_txns['Card_Type'].mode().empty else None,
+            'active_hours': Counter(pd.to_datetime(user_txns['Timestamp']).dt.hour).most_common(3),
+            'weekend_transaction_ratio': user_txns['Is_Weekend'].mean(),
+            'reference_photo_s3_path': f"s3://fraudguard-data-dev/user-photos/reference/{user_id}.jpg" if user_txns['Transaction_Amount'].max() > 10000 else None
+        }
+        
+        user_profiles.append(profile)
+    
+    return pd.DataFrame(user_profiles)
+
+
+def resample(df, rows, seed=7):
+    """`rows` transactions drawn from df, with user IDs spread over rows / 7 users"""
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), rows)].reset_index(drop=True)
+    user_count = max(rows // 7, 1)
+    sample['User_ID'] = pd.Series(rng.integers(0, user_count, rows)).map('USER_{}'.format)
+    return sample
+
+
+def check_regression(df):
+    start = time.perf_counter()
+    expected = legacy_generate_user_profiles(df)
+    legacy_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    actual = generate_user_profiles(df)
+    grouped_seconds = time.perf_counter() - start
+    
+    try:
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        ok = True
+        print(f"user profiles ({len(actual)} users)  ✅ match")
+    except AssertionError as e:
+        ok = False
+        print(f"user profiles  ❌ MISMATCH\n{e}")
+    
+    print(f"\n{'rows':>12} {'per-user loop':>15} {'grouped':>10}")
+    print(f"{len(df):>12,} {legacy_seconds:>14.2f}s {grouped_seconds:>9.2f}s")
+    return ok
+
+
+def benchmark(df, sizes):
+    for rows in sizes:
+        sample = resample(df, rows)
+        start = time.perf_counter()
+        generate_user_profiles(sample)
+        print(f"{rows:>12,} {'-':>15} {time.perf_counter() - start:>9.2f}s")
+        del sample
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    df = load_transactions(DATASET_PATH)[PROFILE_COLUMNS]
+    print(f"🔎 generate_user_profiles regression check ({len(df)} transactions)\n")
+    
+    ok = check_regression(df)
+    benchmark(df, [rows for rows in sizes if rows != len(df)])
+    
+    sys.exit(0 if ok else 1)
@@ -1,141 +1,664 @@
+import argparse
+import importlib.util
+import os
 import pandas as pd
+import numpy as np
 import json
-from collections import Counter
+
+# Derived-feature definitions shared with the backend scorer. Loaded from the
+# one module file itself, so backend/ is not put on sys.path and neither the
+# service's tools package nor its configuration is imported.
+FEATURE_DEFINITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                        '..', 'backend', 'tools', 'feature_definitions.py')
+_spec = importlib.util.spec_from_file_location('feature_definitions', FEATURE_DEFINITIONS_PATH)
+feature_definitions = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(feature_definitions)
+
+DAILY_WINDOW = feature_definitions.DAILY_WINDOW
+WEEKLY_WINDOW = feature_definitions.WEEKLY_WINDOW
+MEDIAN_ACCOUNT_BALANCE = feature_definitions.MEDIAN_ACCOUNT_BALANCE
+MEDIAN_CARD_AGE = feature_definitions.MEDIAN_CARD_AGE
+MEDIAN_AVG_TRANSACTION_7D = feature_definitions.MEDIAN_AVG_TRANSACTION_7D
+amount_deviation_ratio = feature_definitions.amount_deviation_ratio
+is_high_value = feature_definitions.is_high_value
+is_new_device = feature_definitions.is_new_device
+is_new_device_as_of = feature_definitions.is_new_device_as_of
+is_unusual_hour = feature_definitions.is_unusual_hour
+
+INPUT_PATH = 'synthetic_fraud_dataset.csv'
+USER_PROFILES_PATH = 'user_profiles.json'
+ENHANCED_BASENAME = 'transactions_enhanced'
+
+# Enhanced transaction storage formats -> file extension
+STORAGE_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Counter.most_common size for the behavioral baselines
+TOP_N = 3
+
+# Raw columns the user profiles are built from
+PROFILE_COLUMNS = ['User_ID', 'Transaction_Amount', 'Timestamp', 'Location', 'Device_Type',
+                   'Merchant_Category', 'Previous_Fraudulent_Activity', 'Card_Type', 'Is_Weekend']
+
+# How per-user stats from different chunks combine
+USER_STAT_MERGE = {
+    'first_row': 'min',
+    'total_transactions': 'sum',
+    'amount_sum': 'sum',
+    'first_seen': 'min',
+    'last_seen': 'max',
+    'fraud_history_count': 'sum',
+    'highest_transaction': 'max',
+    'weekend_count': 'sum'
+}
+
+# User profiles serialized per batch, so the JSON is never built in one string
+PROFILE_WRITE_BATCH = 10000
+
+# Typed columnar schema (Parquet / Arrow IPC): dictionary-encoded categoricals
+# and narrow integers; other columns keep their pandas dtype
+CATEGORICAL_COLUMNS = ['Transaction_Type', 'Device_Type', 'Location', 'Merchant_Category',
+                       'Card_Type', 'Authentication_Method']
+STORAGE_DTYPES = {
+    'IP_Address_Flag': 'int8',
+    'Previous_Fraudulent_Activity': 'int8',
+    'Daily_Transaction_Count': 'int16',
+    'Failed_Transaction_Count_7d': 'int16',
+    'Card_Age': 'int16',
+    'Is_Weekend': 'int8',
+    'Fraud_Label': 'int8',
+    'hour_of_day': 'int8',
+    'day_of_week': 'int8',
+    'is_unusual_hour': 'int8',
+    'is_high_value': 'int8',
+    'is_new_device': 'int8'
+}
+
 
 # ============================================================================
 # Load Kaggle Dataset
 # ============================================================================
-df = pd.read_csv('synthetic_fraud_dataset.csv')
-# Convert timestamp to datetime FIRST (before any operations)
-df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-print(f"📂 Loaded {len(df)} transactions with {df['User_ID'].nunique()} unique users")
+
+def load_transactions(path, usecols=None):
+    """Read the raw transaction CSV with parsed timestamps"""
+    df = pd.read_csv(path, usecols=usecols)
+    # Convert timestamp to datetime FIRST (before any operations)
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    return df
+
+
+def iter_transactions(path, chunksize, usecols=None):
+    """Read the raw transaction CSV in chunks of `chunksize` rows, timestamps parsed"""
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols):
+        chunk['Timestamp'] = pd.to_datetime(chunk['Timestamp'])
+        yield chunk
 
 
 # ============================================================================
 # PART 1: Generate User Profiles Dataset
 # ============================================================================
 
+def aggregate_transactions(transactions_df, row_offset=0):
+    """
+    Partial per-user aggregates of a block of transactions
+
+    Holds everything the user profiles are built from, in a form that
+    merge_aggregates can combine across chunks; its size grows with users
+    and distinct values, not with rows.
+
+    Args:
+        transactions_df (pd.DataFrame): Transactions with PROFILE_COLUMNS
+        row_offset (int): Position of the block's first row in the dataset
+            (users and tied values are ordered by first occurrence)
+
+    Returns:
+        dict: 'users' -> per-user stats indexed by User_ID; 'Location',
+            'Merchant_Category', 'Card_Type', 'Device_Type' and 'hour' ->
+            (User_ID, value) counts with the first row each pair was seen
+    """
+    # Factorize once: codes follow first appearance, like User_ID.unique()
+    user_codes, user_ids = pd.factorize(transactions_df['User_ID'])
+    rows = np.arange(row_offset, row_offset + len(transactions_df))
+
+    users = transactions_df.groupby(user_codes).agg(
+        total_transactions=('Transaction_Amount', 'size'),
+        amount_sum=('Transaction_Amount', 'sum'),
+        first_seen=('Timestamp', 'min'),
+        last_seen=('Timestamp', 'max'),
+        fraud_history_count=('Previous_Fraudulent_Activity', 'sum'),
+        highest_transaction=('Transaction_Amount', 'max'),
+        weekend_count=('Is_Weekend', 'sum')
+    )
+    users.insert(0, 'first_row', rows[np.unique(user_codes, return_index=True)[1]])
+    users.index = user_ids
+
+    aggregates = {'users': users}
+    counted = {
+        'Location': transactions_df['Location'].array,
+        'Merchant_Category': transactions_df['Merchant_Category'].array,
+        'Card_Type': transactions_df['Card_Type'].array,
+        'Device_Type': transactions_df['Device_Type'].array,
+        'hour': transactions_df['Timestamp'].dt.hour.array
+    }
+    for column, values in counted.items():
+        pairs = pd.DataFrame({'user': user_codes, 'value': values, 'row': rows})
+        counts = pairs.groupby(['user', 'value'], sort=False, dropna=False).agg(
+            count=('row', 'size'),
+            first_row=('row', 'min')
+        ).reset_index()
+        counts.insert(0, 'User_ID', user_ids.take(counts.pop('user')))
+        aggregates[column] = counts
+
+    return aggregates
+
+
+def merge_aggregates(left, right):
+    """Combine the aggregates of two blocks of transactions (left may be None)"""
+    if left is None:
+        return right
+
+    merged = {
+        'users': pd.concat([left['users'], right['users']]).groupby(level=0, sort=False).agg(USER_STAT_MERGE)
+    }
+    for column in left.keys() - {'users'}:
+        merged[column] = pd.concat([left[column], right[column]]).groupby(
+            ['User_ID', 'value'], sort=False, dropna=False
+        ).agg(count=('count', 'sum'), first_row=('first_row', 'min')).reset_index()
+    return merged
+
+
+def collect_lists(user_codes, items):
+    """
+    Per-user lists from rows already grouped contiguously by user code
+
+    Args:
+        user_codes (np.ndarray): User code per row
+        items (iterable): List element per row
+
+    Returns:
+        pd.Series: User code -> list of that user's items, in row order
+    """
+    starts = np.flatnonzero(np.r_[True, user_codes[1:] != user_codes[:-1]])
+    ends = np.r_[starts[1:], len(user_codes)]
+    items = list(items)
+    return pd.Series([items[start:end] for start, end in zip(starts, ends)],
+                     index=user_codes[starts], dtype=object)
+
+
+def top_value_counts(counts, n=TOP_N):
+    """
+    Per-user n most frequent values, for every user at once
+
+    Matches Counter(values).most_common(n): count descending, ties in order
+    of first occurrence.
+
+    Returns:
+        pd.Series: User code -> [(value, count), ...]
+    """
+    top = counts.sort_values(['user', 'count', 'first_row'], ascending=[True, False, True]).groupby('user').head(n)
+    return collect_lists(top['user'].to_numpy(), zip(top['value'].tolist(), top['count'].tolist()))
+
+
+def mode_values(counts):
+    """
+    Per-user most frequent value (Series.mode()[0]: ties go to the smallest)
+
+    Returns:
+        pd.Series: User code -> value
+    """
+    modes = counts[counts['value'].notna()].sort_values(['count', 'value'], ascending=[False, True])
+    return modes.drop_duplicates('user').set_index('user')['value'].astype(object)
+
+
+def profiles_from_aggregates(aggregates):
+    """
+    Build the user profiles from (merged) per-user aggregates
+
+    Returns:
+        pd.DataFrame: One profile per user, in first-appearance order
+    """
+
+    users = aggregates['users'].sort_values('first_row')
+    user_ids = users.index
+    users = users.reset_index(drop=True)
+    account_age_days = (users['last_seen'] - users['first_seen']).dt.days
+
+    # Value counts keyed by the user's position in the profile table
+    counts = {
+        column: aggregates[column].assign(user=user_ids.get_indexer(aggregates[column]['User_ID']))
+        for column in aggregates.keys() - {'users'}
+    }
+
+    # Known devices in order of first use
+    devices = counts['Device_Type'].sort_values(['user', 'first_row'])
+    known_devices = collect_lists(devices['user'].to_numpy(), devices['value'].tolist())
+
+    # Placeholder for deepfake feature
+    reference_photos = pd.Series('s3://fraudguard-data-dev/user-photos/reference/' + user_ids.astype(str) + '.jpg',
+                                 dtype=object)
+
+    return pd.DataFrame({
+        'user_id': user_ids,
+        'total_transactions': users['total_transactions'],
+        'avg_transaction_amount': users['amount_sum'] / users['total_transactions'],
+        'account_age_days': account_age_days,
+        'transaction_frequency': users['total_transactions'] / account_age_days.clip(lower=1),
+
+        # Behavioral baselines (top 3 most frequent)
+        'typical_locations': top_value_counts(counts['Location']),
+        'home_location': mode_values(counts['Location']),
+        'known_devices': known_devices,
+        'typical_merchants': top_value_counts(counts['Merchant_Category']),
+
+        # Risk profile
+        'fraud_history_count': users['fraud_history_count'],
+        'highest_transaction': users['highest_transaction'],
+        'typical_card_type': mode_values(counts['Card_Type']),
+
+        # Temporal patterns
+        'active_hours': top_value_counts(counts['hour']),
+        'weekend_transaction_ratio': users['weekend_count'] / users['total_transactions'],
+
+        'reference_photo_s3_path': reference_photos.where(users['highest_transaction'] > 10000, None)
+    })
+
+
 def generate_user_profiles(transactions_df):
-    """Aggregate transaction data to create user profiles"""
-    
-    user_profiles = []
-    
-    for user_id in transactions_df['User_ID'].unique():
-        user_txns = transactions_df[transactions_df['User_ID'] == user_id]
-        
-        # Basic stats
-        profile = {
-            'user_id': user_id,
-            'total_transactions': len(user_txns),
-            'avg_transaction_amount': user_txns['Transaction_Amount'].mean(),
-            'account_age_days': (user_txns['Timestamp'].max() - user_txns['Timestamp'].min()).days,
-            'transaction_frequency': len(user_txns) / max((user_txns['Timestamp'].max() - user_txns['Timestamp'].min()).days, 1),
-            
-            # Behavioral baselines (top 3 most frequent)
-            'typical_locations': Counter(user_txns['Location']).most_common(3),
-            'home_location': user_txns['Location'].mode()[0] if not user_txns['Location'].mode().empty else None,
-            'known_devices': user_txns['Device_Type'].unique().tolist(),
-            'typical_merchants': Counter(user_txns['Merchant_Category']).most_common(3),
-            
-            # Risk profile
-            'fraud_history_count': user_txns['Previous_Fraudulent_Activity'].sum(),
-            'highest_transaction': user_txns['Transaction_Amount'].max(),
-            'typical_card_type': user_txns['Card_Type'].mode()[0] if not user_txns['Card_Type'].mode().empty else None,
-            
-            # Temporal patterns
-            'active_hours': Counter(pd.to_datetime(user_txns['Timestamp']).dt.hour).most_common(3),
-            'weekend_transaction_ratio': user_txns['Is_Weekend'].mean(),
-            
-            # Placeholder for deepfake feature
-            'reference_photo_s3_path': f"s3://fraudguard-data-dev/user-photos/reference/{user_id}.jpg" if user_txns['Transaction_Amount'].max() > 10000 else None
-        }
-        
-        user_profiles.append(profile)
-    
-    return pd.DataFrame(user_profiles)
+    """
+    Aggregate transaction data to create user profiles
 
-# Generate user profiles
-user_profiles_df = generate_user_profiles(df)
+    Grouped aggregations over integer user codes instead of filtering the
+    full DataFrame once per user, so cost is linear in rows. Users are in
+    first-appearance order.
+    """
+    return profiles_from_aggregates(aggregate_transactions(transactions_df))
 
-# Save to JSON (for DynamoDB upload)
-user_profiles_df.to_json('user_profiles.json', orient='records', indent=2)
-print(f"✅ Generated {len(user_profiles_df)} user profiles → user_profiles.json")
+
+def write_user_profiles(profiles, path):
+    """Save profiles as a JSON array of records, serialized in batches"""
+    with open(path, 'w') as f:
+        f.write('[')
+        for start in range(0, len(profiles), PROFILE_WRITE_BATCH):
+            records = profiles.iloc[start:start + PROFILE_WRITE_BATCH].to_json(orient='records', indent=2)
+            # Strip the batch's own "[\n" ... "\n]" so batches join into one array
+            f.write((',' if start else '') + '\n' + records[2:-2])
+        f.write('\n]' if len(profiles) else ']')
 
 
 # ============================================================================
 # PART 2: Enhance Transaction Dataset with Calculated Features
 # ============================================================================
 
-# Convert timestamp to datetime
-df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+def enhance_transactions(df, aggregates=None, point_in_time=False):
+    """
+    Add the calculated model features to the transaction DataFrame
+
+    Column operations and groupby-transforms only (no row-wise apply), so the
+    cost is linear in rows. The derived features come from
+    backend/tools/feature_definitions.py, as in the online scorer.
+
+    Args:
+        df (pd.DataFrame): Transactions (the whole dataset, or one chunk)
+        aggregates (dict): Dataset-wide aggregate_transactions output, for
+            chunks; by default the per-user baselines come from df itself
+        point_in_time (bool): Per-user baselines (largest amount, known
+            devices) from each user's earlier transactions only, as the
+            online scorer sees them; needs the whole dataset
+    """
 
-# Extract temporal features
-df['hour_of_day'] = df['Timestamp'].dt.hour
-df['day_of_week'] = df['Timestamp'].dt.dayofweek
-df['is_unusual_hour'] = df['hour_of_day'].apply(lambda x: 1 if 2 <= x <= 6 else 0)
+    # Extract temporal features
+    df['hour_of_day'] = df['Timestamp'].dt.hour
+    df['day_of_week'] = df['Timestamp'].dt.dayofweek
+    df['is_unusual_hour'] = is_unusual_hour(df['hour_of_day'])
 
-# Calculate behavioral deviations
-df['amount_deviation_ratio'] = df['Transaction_Amount'] / df['Avg_Transaction_Amount_7d'].replace(0, 1)
+    # Calculate behavioral deviations
+    df['amount_deviation_ratio'] = amount_deviation_ratio(df['Transaction_Amount'], df['Avg_Transaction_Amount_7d'])
 
-# Create user profile lookup for anomaly detection
-user_max_amounts = df.groupby('User_ID')['Transaction_Amount'].max().to_dict()
-user_devices = df.groupby('User_ID')['Device_Type'].apply(list).to_dict()
+    if point_in_time:
+        ordered = df[['User_ID', 'Timestamp', 'Transaction_Amount']].sort_values(['User_ID', 'Timestamp'], kind='stable')
+        all_time = ordered['Timestamp'].max() - ordered['Timestamp'].min() + pd.Timedelta(days=1)
+        earlier_max = ordered.set_index('Timestamp').groupby('User_ID')['Transaction_Amount'].rolling(
+            all_time, closed='left'
+        ).max()
+        user_max_amount = pd.Series(earlier_max.to_numpy(), index=ordered.index).fillna(0).reindex(df.index)
+        df['is_high_value'] = is_high_value(df['Transaction_Amount'], user_max_amount)
+        df['is_new_device'] = is_new_device_as_of(
+            df.groupby(['User_ID', 'Device_Type'], sort=False)['Timestamp'].transform('min'),
+            df.groupby('User_ID', sort=False)['Timestamp'].transform('min'),
+            df['Timestamp']
+        )
+        return df
 
-# Anomaly flags
-df['is_high_value'] = df.apply(lambda row: 1 if row['Transaction_Amount'] > user_max_amounts.get(row['User_ID'], 0) * 0.8 else 0, axis=1)
-df['is_new_device'] = df.apply(lambda row: 0 if row['Device_Type'] in user_devices.get(row['User_ID'], []) else 1, axis=1)
+    # Per-user baselines broadcast back to each transaction
+    if aggregates is None:
+        user_max_amount = df.groupby('User_ID', sort=False)['Transaction_Amount'].transform('max')
+        known_device_pairs = pd.MultiIndex.from_frame(df[['User_ID', 'Device_Type']].drop_duplicates())
+    else:
+        user_max_amount = df['User_ID'].map(aggregates['users']['highest_transaction'])
+        devices = aggregates['Device_Type']
+        known_device_pairs = pd.MultiIndex.from_arrays([devices['User_ID'], devices['value']])
+
+    # Anomaly flags
+    df['is_high_value'] = is_high_value(df['Transaction_Amount'], user_max_amount)
+    df['is_new_device'] = is_new_device(pd.MultiIndex.from_frame(df[['User_ID', 'Device_Type']]), known_device_pairs)
+
+    return df
+
+
+def point_in_time_history_features(df):
+    """
+    Replace the user-history columns with point-in-time values
+    
+    The raw columns are snapshots the online scorer cannot reproduce. These
+    are the values backend/tools/feature_store.py serves: each transaction
+    sees only the user's strictly earlier transactions.
+    
+    - Daily_Transaction_Count: transactions in the previous 24h
+    - Avg_Transaction_Amount_7d: mean amount over the previous 7 days, else
+      over all earlier transactions (if non-zero), else MEDIAN_AVG_TRANSACTION_7D
+    - Account_Balance, Card_Age (plus the days since), Failed_Transaction_Count_7d
+      (if at most 7 days old): from the latest earlier transaction, else the defaults
+    - Previous_Fraudulent_Activity: 1 if any earlier transaction was fraud
+    
+    Needs the whole dataset (not a chunk).
+    """
+    ordered = df[['User_ID', 'Timestamp', 'Transaction_Amount', 'Fraud_Label']].sort_values(
+        ['User_ID', 'Timestamp'], kind='stable'
+    )
+    grouped = ordered.set_index('Timestamp').groupby('User_ID')
+    all_time = ordered['Timestamp'].max() - ordered['Timestamp'].min() + pd.Timedelta(days=1)
+    
+    def prior(column, window, statistic):
+        rolling = grouped[column].rolling(window, closed='left')
+        return pd.Series(getattr(rolling, statistic)().to_numpy(), index=ordered.index)
+    
+    daily_count = prior('Transaction_Amount', pd.Timedelta(seconds=DAILY_WINDOW), 'count').fillna(0)
+    weekly_avg = prior('Transaction_Amount', pd.Timedelta(seconds=WEEKLY_WINDOW), 'mean')
+    all_time_avg = prior('Transaction_Amount', all_time, 'mean').replace(0, np.nan)
+    fraud_count = prior('Fraud_Label', all_time, 'sum').fillna(0)
+    
+    # Latest strictly earlier transaction of the same user
+    snapshot_columns = ['Account_Balance', 'Card_Age', 'Failed_Transaction_Count_7d']
+    current = df[['User_ID', 'Timestamp']].reset_index().sort_values('Timestamp', kind='stable')
+    earlier = df[['User_ID', 'Timestamp'] + snapshot_columns].sort_values('Timestamp', kind='stable')
+    earlier = earlier.assign(previous_timestamp=earlier['Timestamp'])
+    latest = pd.merge_asof(current, earlier, on='Timestamp', by='User_ID',
+                           allow_exact_matches=False).set_index('index').reindex(df.index)
+    elapsed = (df['Timestamp'] - latest['previous_timestamp']).dt.total_seconds()
+    
+    df['Daily_Transaction_Count'] = daily_count.reindex(df.index).astype(np.int64)
+    df['Avg_Transaction_Amount_7d'] = weekly_avg.fillna(all_time_avg).fillna(MEDIAN_AVG_TRANSACTION_7D).reindex(df.index)
+    df['Account_Balance'] = latest['Account_Balance'].fillna(MEDIAN_ACCOUNT_BALANCE)
+    df['Card_Age'] = (latest['Card_Age'] + elapsed // 86400).fillna(MEDIAN_CARD_AGE).astype(np.int64)
+    df['Failed_Transaction_Count_7d'] = latest['Failed_Transaction_Count_7d'].where(elapsed <= WEEKLY_WINDOW, 0).astype(np.int64)
+    df['Previous_Fraudulent_Activity'] = (fraud_count.reindex(df.index) > 0).astype(np.int64)
+    
+    return df
 
-# Save enhanced transaction dataset
-df.to_csv('transactions_enhanced.csv', index=False)
-print(f"✅ Enhanced {len(df)} transactions → transactions_enhanced.csv")
 
 # ============================================================================
-# Feature Summary
+# Enhanced Transaction Storage (CSV / Parquet / Arrow IPC)
 # ============================================================================
-print("\n📊 FINAL FEATURE SUMMARY:")
-print(f"User Profiles: {len(user_profiles_df.columns)} attributes")
-print(f"Transaction Features: {len(df.columns)} columns")
-print(f"\nNew calculated features:")
-print("  - hour_of_day")
-print("  - day_of_week")
-print("  - is_unusual_hour")
-print("  - amount_deviation_ratio")
-print("  - is_high_value")
-print("  - is_new_device")
+
+def collect_categories(df, categories=None):
+    """Add df's CATEGORICAL_COLUMNS values to the per-column category sets"""
+    categories = categories if categories is not None else {column: set() for column in CATEGORICAL_COLUMNS}
+    for column in CATEGORICAL_COLUMNS:
+        categories[column].update(df[column].dropna().unique())
+    return categories
+
+
+class EnhancedTransactionWriter:
+    """
+    Write enhanced transactions chunk by chunk; the format follows the
+    path's extension (see STORAGE_FORMATS)
+
+    Columnar formats use STORAGE_DTYPES, and CATEGORICAL_COLUMNS are
+    dictionary-encoded with one fixed dictionary per column (Arrow IPC files
+    allow no other), so every chunk must be covered by `categories`. Arrow
+    IPC files are left uncompressed so readers can memory-map them. Only the
+    columnar formats need pyarrow (imported on first use).
+
+    Args:
+        path (str): Output file
+        categories (dict): Column -> every value it takes in the dataset
+    """
+
+    def __init__(self, path, categories=None):
+        self.path = path
+        self.extension = os.path.splitext(path)[1]
+        if self.extension not in STORAGE_FORMATS.values():
+            raise ValueError(f"Unsupported storage format: {path}")
+        self.dtypes = dict(STORAGE_DTYPES)
+        for column, values in (categories or {}).items():
+            self.dtypes[column] = pd.CategoricalDtype(sorted(values))
+        self._writer = None
+        self._started = False
+
+    def write(self, df):
+        if self.extension == '.csv':
+            df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df.astype(self.dtypes), preserve_index=False)
+            if self._writer is None:
+                if self.extension == '.parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, table.schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, table.schema)
+            self._writer.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_enhanced_columns(path):
+    """Column names of a stored enhanced transaction file, without loading it"""
+    extension = os.path.splitext(path)[1]
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    if extension == '.arrow':
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_enhanced_transactions(path, columns=None):
+    """
+    Load stored enhanced transactions, reading only `columns` if given
+
+    Parquet reads just the selected column chunks; Arrow IPC files are
+    memory-mapped, so unselected columns are never read from disk.
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    if extension == '.arrow':
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            return (table.select(columns) if columns is not None else table).to_pandas()
+    return pd.read_csv(path, usecols=columns)
+
 
 # ============================================================================
 # PART 3: Create Demo Scenarios (5 Hero Examples)
 # ============================================================================
 
-demo_scenarios = []
+DEMO_SCENARIO_FILTERS = {
+    # Scenario 1: Clean legitimate
+    'Clean Transaction': lambda df: (df['Fraud_Label'] == 0) & (df['Risk_Score'] < 20),
+    # Scenario 2: Velocity attack
+    'Velocity Attack': lambda df: (df['Fraud_Label'] == 1) & (df['Daily_Transaction_Count'] > 10),
+    # Scenario 3: Deepfake (augmented with deepfake attributes)
+    'Deepfake Account Takeover': lambda df: (df['Fraud_Label'] == 1) & (df['Transaction_Amount'] > 10000),
+    # Scenario 4: Amount anomaly
+    'Amount Anomaly': lambda df: (df['Fraud_Label'] == 1) & (df['amount_deviation_ratio'] > 10),
+    # Scenario 5: Geographic impossibility
+    'Geographic Impossibility': lambda df: (df['Fraud_Label'] == 1) & (df['Transaction_Distance'] > 1000)
+}
+
+
+def find_demo_candidates(df, found):
+    """First row of df matching each demo scenario not yet in `found` (updated)"""
+    candidates = []
+    for name, scenario_filter in DEMO_SCENARIO_FILTERS.items():
+        if name not in found:
+            match = df[scenario_filter(df)].head(1)
+            if len(match):
+                found.add(name)
+                candidates.append(match)
+    return candidates
+
+
+def create_demo_scenarios(df):
+    """Pick the first transaction matching each demo scenario"""
+    demo_scenarios = []
+    for name, scenario_filter in DEMO_SCENARIO_FILTERS.items():
+        scenario = df[scenario_filter(df)].iloc[0].to_dict()
+        if name == 'Deepfake Account Takeover':
+            scenario['scenario_name'] = name
+            scenario['uploaded_photo_s3_path'] = 's3://fraudguard-data-dev/user-photos/uploads/deepfake_demo.jpg'
+            scenario['biometric_match_score'] = 0.43
+            scenario['deepfake_confidence'] = 0.92
+            demo_scenarios.append(scenario)
+        else:
+            demo_scenarios.append({'scenario_name': name, **scenario})
+    return demo_scenarios
+
+
+# ============================================================================
+# Pipelines
+# ============================================================================
+
+def generate_in_memory(input_path, enhanced_path, point_in_time=False):
+    """
+    Build profiles and enhanced transactions with the whole dataset loaded
+
+    Args:
+        point_in_time (bool): Train on point-in-time user-history columns
+            (point_in_time_history_features) and per-user baselines instead
+            of the raw columns and whole-dataset baselines
+
+    Returns:
+        tuple: (user profiles, enhanced columns, demo scenario source rows)
+    """
+    df = load_transactions(input_path)
+    print(f"📂 Loaded {len(df)} transactions with {df['User_ID'].nunique()} unique users")
+
+    # Generate user profiles
+    user_profiles_df = generate_user_profiles(df)
+
+    # Save to JSON (for DynamoDB upload)
+    write_user_profiles(user_profiles_df, USER_PROFILES_PATH)
+    print(f"✅ Generated {len(user_profiles_df)} user profiles → {USER_PROFILES_PATH}")
+
+    if point_in_time:
+        df = point_in_time_history_features(df)
+        print("✅ Replaced user-history columns with point-in-time values")
+
+    df = enhance_transactions(df, point_in_time=point_in_time)
+
+    # Save enhanced transaction dataset
+    with EnhancedTransactionWriter(enhanced_path, collect_categories(df)) as writer:
+        writer.write(df)
+    print(f"✅ Enhanced {len(df)} transactions → {enhanced_path}")
+
+    return user_profiles_df, df.columns, df
+
+
+def generate_chunked(input_path, enhanced_path, chunksize):
+    """
+    Out-of-core variant of generate_in_memory: two passes over the CSV
+
+    Pass 1 folds each chunk into the per-user aggregates and writes the
+    profiles; pass 2 enhances each chunk against the dataset-wide baselines
+    and appends it to the output. Memory is bounded by the chunk size plus
+    per-user state; outputs match the in-memory mode.
+    """
+    aggregates = None
+    categories = None
+    rows = 0
+    for chunk in iter_transactions(input_path, chunksize, usecols=PROFILE_COLUMNS + ['Transaction_Type', 'Authentication_Method']):
+        aggregates = merge_aggregates(aggregates, aggregate_transactions(chunk, rows))
+        categories = collect_categories(chunk, categories)
+        rows += len(chunk)
+        print(f"   📦 Pass 1: aggregated {rows:,} transactions")
+    print(f"📂 Streamed {rows} transactions with {len(aggregates['users'])} unique users")
+
+    user_profiles_df = profiles_from_aggregates(aggregates)
+    write_user_profiles(user_profiles_df, USER_PROFILES_PATH)
+    print(f"✅ Generated {len(user_profiles_df)} user profiles → {USER_PROFILES_PATH}")
+
+    columns = None
+    found = set()
+    demo_candidates = []
+    with EnhancedTransactionWriter(enhanced_path, categories) as writer:
+        for chunk in iter_transactions(input_path, chunksize):
+            chunk = enhance_transactions(chunk, aggregates)
+            writer.write(chunk)
+            columns = chunk.columns
+            demo_candidates += find_demo_candidates(chunk, found)
+            print(f"   📦 Pass 2: enhanced {chunk.index[-1] + 1:,} transactions")
+    print(f"✅ Enhanced {rows} transactions → {enhanced_path}")
+
+    demo_rows = pd.concat(demo_candidates).sort_index() if demo_candidates else pd.DataFrame(columns=columns)
+    return user_profiles_df, columns, demo_rows
+
 
-# Scenario 1: Clean legitimate
-clean = df[(df['Fraud_Label'] == 0) & (df['Risk_Score'] < 20)].iloc[0].to_dict()
-demo_scenarios.append({'scenario_name': 'Clean Transaction', **clean})
+def main(chunksize=None, storage_format='csv', point_in_time=False):
+    enhanced_path = ENHANCED_BASENAME + STORAGE_FORMATS[storage_format]
+    if chunksize:
+        user_profiles_df, columns, demo_rows = generate_chunked(INPUT_PATH, enhanced_path, chunksize)
+    else:
+        user_profiles_df, columns, demo_rows = generate_in_memory(INPUT_PATH, enhanced_path, point_in_time)
 
-# Scenario 2: Velocity attack
-velocity = df[(df['Fraud_Label'] == 1) & (df['Daily_Transaction_Count'] > 10)].iloc[0].to_dict()
-demo_scenarios.append({'scenario_name': 'Velocity Attack', **velocity})
+    # ============================================================================
+    # Feature Summary
+    # ============================================================================
+    print("\n📊 FINAL FEATURE SUMMARY:")
+    print(f"User Profiles: {len(user_profiles_df.columns)} attributes")
+    print(f"Transaction Features: {len(columns)} columns")
+    print(f"\nNew calculated features:")
+    print("  - hour_of_day")
+    print("  - day_of_week")
+    print("  - is_unusual_hour")
+    print("  - amount_deviation_ratio")
+    print("  - is_high_value")
+    print("  - is_new_device")
 
-# Scenario 3: Deepfake (augment with deepfake attributes)
-deepfake = df[(df['Fraud_Label'] == 1) & (df['Transaction_Amount'] > 10000)].iloc[0].to_dict()
-deepfake['scenario_name'] = 'Deepfake Account Takeover'
-deepfake['uploaded_photo_s3_path'] = 's3://fraudguard-data-dev/user-photos/uploads/deepfake_demo.jpg'
-deepfake['biometric_match_score'] = 0.43
-deepfake['deepfake_confidence'] = 0.92
-demo_scenarios.append(deepfake)
+    demo_scenarios = create_demo_scenarios(demo_rows)
 
-# Scenario 4: Amount anomaly
-amount_anomaly = df[(df['Fraud_Label'] == 1) & (df['amount_deviation_ratio'] > 10)].iloc[0].to_dict()
-demo_scenarios.append({'scenario_name': 'Amount Anomaly', **amount_anomaly})
+    # Save demo scenarios
+    with open('demo_scenarios.json', 'w') as f:
+        json.dump(demo_scenarios, f, indent=2, default=str)
+    print(f"\n✅ Created 5 demo scenarios → demo_scenarios.json")
 
-# Scenario 5: Geographic impossibility
-geo_impossible = df[(df['Fraud_Label'] == 1) & (df['Transaction_Distance'] > 1000)].iloc[0].to_dict()
-demo_scenarios.append({'scenario_name': 'Geographic Impossibility', **geo_impossible})
+    print("\n🎉 Data generation complete!")
 
-# Save demo scenarios
-with open('demo_scenarios.json', 'w') as f:
-    json.dump(demo_scenarios, f, indent=2, default=str)
-print(f"\n✅ Created 5 demo scenarios → demo_scenarios.json")
 
-print("\n🎉 Data generation complete!")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate user profiles and enhanced transactions")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows (bounded memory, two passes)")
+    parser.add_argument('--format', choices=STORAGE_FORMATS, default='csv',
+                        help="Enhanced transaction storage: csv, or typed columnar parquet / arrow (IPC)")
+    parser.add_argument('--point-in-time', action='store_true',
+                        help="User-history columns and per-user baselines from each user's earlier "
+                             "transactions, as the online scorer sees them (needs the whole dataset; "
+                             "not with --chunksize)")
+    args = parser.parse_args()
+    if args.point_in_time and args.chunksize:
+        parser.error("--point-in-time needs the whole dataset and cannot be combined with --chunksize")
+    main(args.chunksize, args.format, args.point_in_time)
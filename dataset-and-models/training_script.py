@@ -6,6 +6,11 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, precision_recall_curve
 import pickle
 import json
+import sys
+from dataset_generation import read_enhanced_columns, read_enhanced_transactions
+
+# Enhanced transactions: .csv, .parquet or .arrow (dataset_generation.py --format)
+DATA_PATH = sys.argv[1] if len(sys.argv) > 1 else 'transactions_enhanced.csv'
 
 print("🚀 Starting XGBoost Fraud Detection Model Training...\n")
 
@@ -13,15 +18,6 @@ print("🚀 Starting XGBoost Fraud Detection Model Training...\n")
 # STEP 1: Load Enhanced Transaction Dataset
 # ============================================================================
 print("📂 Loading data...")
-df = pd.read_csv('transactions_enhanced.csv')
-print(f"✅ Loaded {len(df)} transactions")
-print(f"   - Fraud cases: {df['Fraud_Label'].sum()} ({df['Fraud_Label'].mean()*100:.1f}%)")
-print(f"   - Legitimate: {(df['Fraud_Label']==0).sum()} ({(df['Fraud_Label']==0).mean()*100:.1f}%)\n")
-
-# ============================================================================
-# STEP 2: Feature Selection (22 features for training)
-# ============================================================================
-print("🎯 Selecting features...")
 
 # Features to EXCLUDE from training
 exclude_features = [
@@ -32,8 +28,18 @@ exclude_features = [
     'Risk_Score'          # Optional: pre-computed score
 ]
 
-# Get all feature columns
-feature_cols = [col for col in df.columns if col not in exclude_features]
+# Read only the training columns (pruned on read for Parquet / Arrow)
+stored_columns = read_enhanced_columns(DATA_PATH)
+feature_cols = [col for col in stored_columns if col not in exclude_features]
+df = read_enhanced_transactions(DATA_PATH, columns=feature_cols + ['Fraud_Label'])
+print(f"✅ Loaded {len(df)} transactions from {DATA_PATH}")
+print(f"   - Fraud cases: {df['Fraud_Label'].sum()} ({df['Fraud_Label'].mean()*100:.1f}%)")
+print(f"   - Legitimate: {(df['Fraud_Label']==0).sum()} ({(df['Fraud_Label']==0).mean()*100:.1f}%)\n")
+
+# ============================================================================
+# STEP 2: Feature Selection (22 features for training)
+# ============================================================================
+print("🎯 Selecting features...")
 print(f"✅ Using {len(feature_cols)} features for training\n")
 
 # ============================================================================